@@ -0,0 +1,402 @@
+# api.py - API JSON lokal (asyncio) untuk katalog, bobot, dan ranking
+#
+# Contoh pemakaian:
+#   python api.py                        # http://127.0.0.1:8765
+#   python api.py --port 9000 --workers 8
+#
+# Layanan ringan di samping UI Streamlit, memakai database SQLite, Storage,
+# dan fungsi skoring yang sama. Hanya mendengarkan di localhost.
+#
+#   GET    /health
+#   GET    /stats
+#   GET    /users/{username}/laptops[?q=kata kunci]
+#   POST   /users/{username}/laptops            objek atau list objek laptop
+#   PUT    /users/{username}/laptops/{id}
+#   DELETE /users/{username}/laptops            {"ids": [...]}
+#   GET    /users/{username}/bobot
+#   PUT    /users/{username}/bobot              {"harga": 0.25, ...}
+#   GET    /users/{username}/ranking[?metode=wp|maut&k=10]
+#
+# Event loop hanya mengurus I/O jaringan; semua kerja SQLite dan NumPy berjalan
+# di thread pool (keduanya melepas GIL). Permintaan ranking serentak untuk kunci
+# yang sama (pengguna, versi katalog, bobot, batasan, config Likert) digabung
+# menjadi satu perhitungan, dan hasilnya dibagi dengan UI lewat RankingCache.
+
+import argparse
+import asyncio
+import json
+import os
+import re
+from concurrent.futures import ThreadPoolExecutor
+from urllib.parse import parse_qs, unquote, urlsplit
+
+import pandas as pd
+
+from ranking_cache import RankingCache, make_cache_key
+from ranking_stream import OUT_OF_CORE_THRESHOLD, rank_out_of_core
+from spk import calculate_maut, calculate_wp, likert_config, rank_results
+from storage import SQLiteBackend, Storage
+from validasi import validate_upload
+
+DB_PATH = "laptop_spk_v2.db"
+HOST = "127.0.0.1"
+DEFAULT_PORT = 8765
+MAX_BODY = 10 * 1024 * 1024  # 10 MB
+DEFAULT_TOP_K = 10
+
+STATUS_TEXT = {
+    200: "OK",
+    201: "Created",
+    400: "Bad Request",
+    404: "Not Found",
+    405: "Method Not Allowed",
+    413: "Payload Too Large",
+    500: "Internal Server Error",
+}
+
+
+class ApiError(Exception):
+    """Kesalahan yang dikembalikan ke klien sebagai respons JSON."""
+
+    def __init__(self, status, message):
+        super().__init__(message)
+        self.status = status
+
+
+def _records(df):
+    """DataFrame -> list dict yang aman untuk JSON (NaN -> null, skalar NumPy -> Python)."""
+    return json.loads(df.to_json(orient="records", double_precision=15))
+
+
+def _validate_laptops(body):
+    """Memvalidasi satu/lebih laptop dengan aturan yang sama seperti unggahan Excel."""
+    items = body if isinstance(body, list) else [body]
+    if not items or not all(isinstance(item, dict) for item in items):
+        raise ApiError(400, "Body harus berupa objek laptop atau list objek laptop")
+    df = pd.DataFrame(items)
+    kolom = ["nama", "harga", "ram", "storage", "prosesor", "gpu", "layar", "rating"]
+    missing = [k for k in kolom if k not in df.columns]
+    if missing:
+        raise ApiError(400, f"Kolom yang hilang: {', '.join(missing)}")
+    return validate_upload(df[kolom])
+
+
+class RankingAPI:
+    """Router dan handler; setiap handler mengembalikan (status, objek JSON)."""
+
+    def __init__(self, db_path=DB_PATH, workers=None):
+        workers = workers or os.cpu_count() or 1
+        self.storage = Storage(SQLiteBackend(db_path), pool_size=workers)
+        self.storage.setup_schema()
+        self.cache = RankingCache(storage=self.storage)
+        self.executor = ThreadPoolExecutor(max_workers=workers)
+        self._inflight = {}  # kunci ranking -> asyncio.Future yang sedang dihitung
+        self.computed = self.coalesced = 0
+        self.routes = [
+            ("GET", r"/health", self.health),
+            ("GET", r"/stats", self.stats),
+            ("GET", r"/users/(?P<username>[^/]+)/laptops", self.list_laptops),
+            ("POST", r"/users/(?P<username>[^/]+)/laptops", self.create_laptops),
+            ("PUT", r"/users/(?P<username>[^/]+)/laptops/(?P<id>\d+)", self.update_laptop),
+            ("DELETE", r"/users/(?P<username>[^/]+)/laptops", self.delete_laptops),
+            ("GET", r"/users/(?P<username>[^/]+)/bobot", self.get_bobot),
+            ("PUT", r"/users/(?P<username>[^/]+)/bobot", self.put_bobot),
+            ("GET", r"/users/(?P<username>[^/]+)/ranking", self.ranking),
+        ]
+
+    def run(self, fn, *args):
+        """Menjalankan fungsi blocking di thread pool."""
+        return asyncio.get_running_loop().run_in_executor(self.executor, fn, *args)
+
+    async def dispatch(self, method, target, body):
+        url = urlsplit(target)
+        path = unquote(url.path).rstrip("/") or "/"
+        query = {k: v[-1] for k, v in parse_qs(url.query).items()}
+        allowed = False
+        for route_method, pattern, handler in self.routes:
+            match = re.fullmatch(pattern, path)
+            if not match:
+                continue
+            if route_method == method:
+                return await handler(body=body, query=query, **match.groupdict())
+            allowed = True
+        raise ApiError(405 if allowed else 404, f"{method} {path} tidak tersedia")
+
+    # --- Umum ---
+    async def health(self, **_):
+        return 200, {"status": "ok"}
+
+    async def stats(self, **_):
+        return 200, {
+            "ranking_dihitung": self.computed,
+            "ranking_digabung": self.coalesced,
+            "cache": self.cache.stats(),
+        }
+
+    # --- Katalog ---
+    async def list_laptops(self, username, query, **_):
+        if query.get("q"):
+            df = await self.run(self.storage.search_laptops, username, query["q"])
+        else:
+            df = await self.run(self.storage.get_user_laptops, username)
+        return 200, {"laptops": _records(df)}
+
+    async def create_laptops(self, username, body, **_):
+        valid, skipped, _ = await self.run(_validate_laptops, body)
+        inserted = await self.run(self.storage.insert_laptops, username, valid)
+        # Nomor baris Excel (+2) diganti indeks item pada body
+        dilewati = [
+            {"indeks": int(baris) - 2, "penyebab": penyebab}
+            for baris, penyebab in skipped.itertuples(index=False, name=None)
+        ]
+        return 201, {"ditambahkan": inserted, "dilewati": dilewati}
+
+    def _write(self, username, method, *args):
+        """Satu operasi unit of work; mengembalikan entri jurnal yang ditulis."""
+        with self.storage.unit_of_work(username) as uow:
+            getattr(uow, method)(*args)
+        return uow.journal
+
+    async def update_laptop(self, username, id, body, **_):
+        valid, skipped, _ = await self.run(_validate_laptops, body)
+        if len(skipped):
+            raise ApiError(400, skipped["Penyebab Error"].iloc[0])
+        journal = await self.run(
+            self._write, username, "update_laptop", int(id), valid.iloc[0]
+        )
+        if not journal:
+            # Update tanpa perubahan tidak dijurnal; bedakan dari id yang tidak ada
+            ada = await self.run(self.storage.get_laptops_by_ids, username, [int(id)])
+            if ada.empty:
+                raise ApiError(404, f"Laptop {id} tidak ditemukan")
+        kolom = journal[0]["kolom"] if journal else []
+        return 200, {"diperbarui": int(id), "kolom": kolom}
+
+    async def delete_laptops(self, username, body, **_):
+        ids = body.get("ids") if isinstance(body, dict) else None
+        if not isinstance(ids, list) or not all(
+            isinstance(i, int) and not isinstance(i, bool) for i in ids
+        ):
+            raise ApiError(400, 'Body harus berupa {"ids": [id, ...]}')
+        journal = await self.run(self._write, username, "delete_laptops", ids)
+        # Hanya id yang benar-benar ada yang tercatat di jurnal
+        return 200, {"dihapus": sum(len(e["ids"]) for e in journal)}
+
+    # --- Bobot ---
+    async def get_bobot(self, username, **_):
+        bobot, tipe = await self.run(self.storage.get_bobot, username)
+        return 200, {"bobot": bobot, "tipe": tipe}
+
+    async def put_bobot(self, username, body, **_):
+        if not isinstance(body, dict) or not body:
+            raise ApiError(400, "Body harus berupa objek {kriteria: bobot}")
+        unknown = set(body) - set(likert_config)
+        if unknown:
+            raise ApiError(400, f"Kriteria tidak dikenal: {', '.join(sorted(unknown))}")
+        # bool adalah subkelas int di Python, jadi harus dikecualikan
+        if not all(
+            isinstance(w, (int, float)) and not isinstance(w, bool) and w >= 0
+            for w in body.values()
+        ):
+            raise ApiError(400, "Bobot harus berupa angka >= 0")
+        # Sama seperti form di UI: total bobot harus 100%
+        if abs(sum(body.values()) - 1.0) > 1e-6:
+            raise ApiError(400, "Total bobot harus 1.0 (100%)")
+        await self.run(self.storage.update_bobot, username, body)
+        return 200, {"bobot": body}
+
+    # --- Ranking ---
+    def _ranking_inputs(self, username):
+        """Semua input yang menentukan hasil ranking, dibaca sekali per permintaan."""
+        bobot, tipe = self.storage.get_bobot(username)
+        batasan = self.storage.get_batasan(username)
+        config = self.storage.get_likert_config(username)
+        versi = self.storage.get_catalog_version(username)
+        key = make_cache_key(username, versi, bobot, tipe, config, batasan)
+        return key, versi, bobot, tipe, batasan, config
+
+    def _compute_ranking(self, username, key, bobot, tipe, batasan, config, k):
+        """Sama seperti get_ranking di web.py; katalog sangat besar memakai out-of-core."""
+        if self.storage.count_user_laptops(username, batasan) > OUT_OF_CORE_THRESHOLD:
+            hasil, total = rank_out_of_core(
+                self.storage, username, bobot, tipe, batasan, k, config=config
+            )
+            return {"top": hasil, "total": total}
+        hasil = self.cache.get(key)
+        if hasil is None:
+            df = self.storage.get_user_laptops(username, batasan)
+            if len(df) < 2:
+                return None
+            df_maut = calculate_maut(df, bobot, tipe)
+            df_wp = calculate_wp(df, bobot, tipe, config)
+            hasil = {
+                "results": rank_results(df, df_maut, df_wp),
+                "maut": df_maut,
+                "wp": df_wp,
+            }
+            self.cache.put(key, hasil)
+        return hasil
+
+    async def _coalesced_ranking(self, username, k):
+        key, versi, bobot, tipe, batasan, config = await self.run(
+            self._ranking_inputs, username
+        )
+        # k hanya memengaruhi hasil jalur out-of-core, tetapi ikut di kunci agar
+        # permintaan Top-K berbeda tidak saling menunggu hasil yang terpotong.
+        inflight_key = (key, k)
+        future = self._inflight.get(inflight_key)
+        if future is not None:
+            self.coalesced += 1
+            return versi, await asyncio.shield(future)
+
+        future = asyncio.get_running_loop().create_future()
+        self._inflight[inflight_key] = future
+        try:
+            hasil = await self.run(
+                self._compute_ranking, username, key, bobot, tipe, batasan, config, k
+            )
+            self.computed += 1
+            future.set_result(hasil)
+        except BaseException as e:
+            future.set_exception(e)
+            future.exception()  # Ditandai sudah dibaca jika tidak ada penunggu lain
+            raise
+        finally:
+            del self._inflight[inflight_key]
+        return versi, hasil
+
+    async def ranking(self, username, query, **_):
+        metode = query.get("metode", "wp").upper()
+        if metode not in ("WP", "MAUT"):
+            raise ApiError(400, "metode harus 'wp' atau 'maut'")
+        try:
+            k = int(query.get("k", DEFAULT_TOP_K))
+        except ValueError:
+            raise ApiError(400, "k harus berupa bilangan bulat")
+        if k < 1:
+            raise ApiError(400, "k harus >= 1")
+
+        versi, hasil = await self._coalesced_ranking(username, k)
+        if hasil is None:
+            raise ApiError(400, "Dibutuhkan minimal 2 data laptop untuk perankingan")
+        if "top" in hasil:
+            top, total = hasil["top"][metode], hasil["total"]
+        else:
+            results = hasil["results"]
+            top = results.nsmallest(k, f"Rank {metode}", keep="first")
+            total = len(results)
+        top = top[["id", "nama", f"Skor {metode}", f"Rank {metode}"]].head(k)
+        top.columns = ["id", "nama", "skor", "rank"]
+        return 200, {
+            "username": username,
+            "versi_katalog": versi,
+            "metode": metode,
+            "total": total,
+            "hasil": _records(top),
+        }
+
+
+# ---------- Server HTTP/1.1 minimal ----------
+async def read_request(reader):
+    """Membaca satu request; None jika koneksi ditutup klien."""
+    line = await reader.readline()
+    if not line:
+        return None
+    try:
+        method, target, _ = line.decode("latin-1").split(" ", 2)
+    except ValueError:
+        raise ApiError(400, "Request line tidak valid")
+    headers = {}
+    while True:
+        line = await reader.readline()
+        if line in (b"\r\n", b"\n", b""):
+            break
+        name, _, value = line.decode("latin-1").partition(":")
+        headers[name.strip().lower()] = value.strip()
+    try:
+        length = int(headers.get("content-length") or 0)
+    except ValueError:
+        length = -1
+    if length < 0:
+        raise ApiError(400, "Content-Length tidak valid")
+    if length > MAX_BODY:
+        raise ApiError(413, "Body terlalu besar")
+    raw = await reader.readexactly(length) if length else b""
+    try:
+        body = json.loads(raw) if raw else None
+    except json.JSONDecodeError as e:
+        raise ApiError(400, f"JSON tidak valid: {e}")
+    keep_alive = headers.get("connection", "").lower() != "close"
+    return method.upper(), target, body, keep_alive
+
+
+def write_response(writer, status, payload, keep_alive):
+    data = json.dumps(payload, ensure_ascii=False).encode()
+    head = (
+        f"HTTP/1.1 {status} {STATUS_TEXT.get(status, '')}\r\n"
+        "Content-Type: application/json; charset=utf-8\r\n"
+        f"Content-Length: {len(data)}\r\n"
+        f"Connection: {'keep-alive' if keep_alive else 'close'}\r\n\r\n"
+    )
+    writer.write(head.encode() + data)
+
+
+async def handle_connection(api, reader, writer):
+    try:
+        while True:
+            keep_alive = False
+            try:
+                request = await read_request(reader)
+                if request is None:
+                    break
+                method, target, body, keep_alive = request
+                status, payload = await api.dispatch(method, target, body)
+            except ApiError as e:
+                status, payload = e.status, {"error": str(e)}
+            except (ConnectionError, asyncio.IncompleteReadError):
+                break
+            except Exception as e:
+                status, payload = 500, {"error": f"{type(e).__name__}: {e}"}
+            write_response(writer, status, payload, keep_alive)
+            await writer.drain()
+            if not keep_alive:
+                break
+    finally:
+        writer.close()
+
+
+async def serve(db_path=DB_PATH, port=DEFAULT_PORT, workers=None):
+    api = RankingAPI(db_path, workers)
+    server = await asyncio.start_server(
+        lambda r, w: handle_connection(api, r, w), HOST, port
+    )
+    print(f"API berjalan di http://{HOST}:{port} (database: {db_path})")
+    try:
+        async with server:
+            await server.serve_forever()
+    finally:
+        api.executor.shutdown(wait=False)
+        api.storage.close()
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="API JSON lokal untuk katalog, bobot, dan ranking laptop."
+    )
+    parser.add_argument("--db", default=DB_PATH, help="Path database SQLite")
+    parser.add_argument("--port", type=int, default=DEFAULT_PORT, help="Port (localhost)")
+    parser.add_argument(
+        "--workers",
+        type=int,
+        default=None,
+        help="Jumlah thread untuk kerja SQLite/NumPy (default: semua core)",
+    )
+    args = parser.parse_args()
+    try:
+        asyncio.run(serve(args.db, args.port, args.workers))
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,140 @@
+# batch_refresh.py - Perhitungan ulang rekomendasi untuk SEMUA pengguna secara paralel
+#
+# Contoh pemakaian:
+#   python batch_refresh.py                # gunakan semua core CPU
+#   python batch_refresh.py --workers 8    # batasi jumlah proses
+#
+# Setiap worker membuka koneksi SQLite sendiri, membaca data laptop dan bobot
+# pengguna yang menjadi bagiannya, menghitung MAUT & WP, lalu menulis hasilnya ke
+# tabel `hasil_rekomendasi` dalam satu transaksi per kelompok pengguna. Hasil
+# yang sama juga disimpan ke cache ranking persisten (cache_peringkat) dengan
+# kunci yang dipakai web.py & api.py, sehingga halaman hasil langsung tampil
+# saat pengguna login selama katalog, bobot, dan batasannya belum berubah.
+
+import argparse
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+from ranking_cache import dump_payload, make_cache_key
+from spk import calculate_maut, calculate_wp, rank_results
+from storage import SQLiteBackend, Storage
+
+DB_PATH = "laptop_spk_v2.db"
+BUSY_TIMEOUT = 60  # detik menunggu kunci tulis SQLite sebelum menyerah
+
+
+def open_storage(db_path):
+    """Storage dengan satu koneksi; setiap proses worker memiliki miliknya sendiri."""
+    return Storage(SQLiteBackend(db_path, busy_timeout=BUSY_TIMEOUT), pool_size=1)
+
+
+def rank_user(storage, username):
+    """Menghitung peringkat MAUT & WP satu pengguna (setelah filter wajib).
+
+    Mengembalikan (kunci cache, hasil) dengan isi yang sama seperti get_ranking
+    di web.py, atau None jika data kurang dari 2.
+    """
+    # Versi dibaca sebelum data: jika katalog berubah di tengah jalan, kunci
+    # ini sudah basi dan tidak akan pernah dipakai
+    versi = storage.get_catalog_version(username)
+    batasan = storage.get_batasan(username)
+    bobot, tipe = storage.get_bobot(username)
+    config = storage.get_likert_config(username)
+    df = storage.get_user_laptops(username, batasan)
+    if len(df) < 2:
+        return None
+    df_maut = calculate_maut(df, bobot, tipe)
+    df_wp = calculate_wp(df, bobot, tipe, config)
+    key = make_cache_key(username, versi, bobot, tipe, config, batasan)
+    hasil = {"results": rank_results(df, df_maut, df_wp), "maut": df_maut, "wp": df_wp}
+    return key, hasil
+
+
+def _to_py(value):
+    """Mengubah skalar NumPy menjadi tipe Python agar bisa disimpan SQLite."""
+    return value.item() if hasattr(value, "item") else value
+
+
+def refresh_users(db_path, usernames):
+    """Worker: menghitung dan menyimpan hasil untuk sekelompok pengguna."""
+    storage = open_storage(db_path)
+    try:
+        rows, cached = [], []
+        for username in usernames:
+            ranked = rank_user(storage, username)
+            if ranked is None:
+                continue
+            key, hasil = ranked
+            cols = ["id", "nama", "Skor MAUT", "Rank MAUT", "Skor WP", "Rank WP"]
+            rows.extend(
+                (username, *map(_to_py, row))
+                for row in hasil["results"][cols].itertuples(index=False, name=None)
+            )
+            payload = dump_payload(hasil)
+            if payload is not None:
+                cached.append((key, username, payload))
+
+        # Semua perhitungan selesai dulu, baru satu transaksi tulis yang singkat
+        storage.save_recommendations(usernames, rows, cached)
+        return len(usernames), len(rows)
+    finally:
+        storage.close()
+
+
+def partition_users(user_counts, n_parts):
+    """Membagi pengguna ke n_parts kelompok dengan total baris yang seimbang."""
+    parts = [[] for _ in range(n_parts)]
+    loads = [0] * n_parts
+    # Greedy: pengguna dengan katalog terbesar ditempatkan lebih dulu
+    for username, count in sorted(user_counts, key=lambda uc: uc[1], reverse=True):
+        i = loads.index(min(loads))
+        parts[i].append(username)
+        loads[i] += count
+    return [p for p in parts if p]
+
+
+def refresh_all(db_path=DB_PATH, workers=None, parts_per_worker=4):
+    """Menghitung ulang rekomendasi semua pengguna menggunakan process pool."""
+    workers = workers or os.cpu_count() or 1
+    storage = open_storage(db_path)
+    try:
+        storage.setup_schema()
+        user_counts = storage.get_user_counts()
+        # Pengguna yang sudah menghapus semua laptopnya tidak dikunjungi worker
+        storage.prune_recommendations(u for u, _ in user_counts)
+    finally:
+        storage.close()
+
+    # Lebih banyak kelompok daripada worker agar beban tetap merata di akhir
+    parts = partition_users(user_counts, workers * parts_per_worker)
+    total_users = total_rows = 0
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        futures = [pool.submit(refresh_users, db_path, part) for part in parts]
+        for future in as_completed(futures):
+            n_users, n_rows = future.result()
+            total_users += n_users
+            total_rows += n_rows
+    return total_users, total_rows
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Hitung ulang rekomendasi semua pengguna secara paralel."
+    )
+    parser.add_argument("--db", default=DB_PATH, help="Path database SQLite")
+    parser.add_argument(
+        "--workers", type=int, default=None, help="Jumlah proses (default: semua core)"
+    )
+    args = parser.parse_args()
+
+    start = time.perf_counter()
+    n_users, n_rows = refresh_all(args.db, args.workers)
+    print(
+        f"{n_users} pengguna, {n_rows} baris hasil diperbarui "
+        f"dalam {time.perf_counter() - start:.2f} detik."
+    )
+
+
+if __name__ == "__main__":
+    main()
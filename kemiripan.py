@@ -0,0 +1,286 @@
+# kemiripan.py - Indeks "laptop serupa" (KD-tree NumPy) atas kriteria ternormalisasi
+#
+# Titik-titik indeks adalah nilai n_* seperti pada calculate_maut (min-max ke
+# 0..1). Jarak |n_a - n_b| tidak bergantung pada tipe cost/benefit, sehingga
+# indeks cukup dibangun sekali per katalog, terlepas dari bobot pengguna.
+#
+# Pembaruan inkremental: saat katalog berubah, baris yang terhapus/berubah
+# ditandai mati di pohon, sedangkan baris baru/berubah masuk ke buffer kecil
+# yang dipindai langsung. Jika jurnal perubahan tersedia, hanya baris yang
+# berubah yang dibaca dari database. Pohon dibangun ulang penuh hanya jika
+# min/max kriteria berubah (skala normalisasi bergeser) atau perubahan menumpuk
+# terlalu banyak.
+
+import heapq
+import threading
+
+import numpy as np
+
+from spk import likert_config
+from storage import expand_ids
+
+DEFAULT_LEAF_SIZE = 32
+# Bangun ulang penuh jika baris mati + buffer melebihi fraksi ini dari pohon
+REBUILD_RATIO = 0.25
+
+
+class KDTree:
+    """KD-tree statis berbasis array; setiap simpul menyimpan bounding box
+    dan harga minimum subpohon untuk memangkas pencarian."""
+
+    def __init__(self, points, harga, leaf_size=DEFAULT_LEAF_SIZE):
+        self.points = points
+        self.harga = harga
+        self.order = np.arange(len(points))
+        self.start, self.end, self.left, self.right = [], [], [], []
+        self.lo, self.hi, self.harga_min = [], [], []
+        if len(points):
+            self._build(0, len(points), leaf_size)
+        self.lo, self.hi = np.array(self.lo), np.array(self.hi)
+
+    def _build(self, start, end, leaf_size):
+        node = len(self.start)
+        idx = self.order[start:end]
+        pts = self.points[idx]
+        self.start.append(start)
+        self.end.append(end)
+        self.left.append(-1)
+        self.right.append(-1)
+        self.lo.append(pts.min(axis=0))
+        self.hi.append(pts.max(axis=0))
+        self.harga_min.append(self.harga[idx].min())
+        spread = self.hi[node] - self.lo[node]
+        if end - start <= leaf_size or spread.max() == 0:
+            return node
+        # Belah di median dimensi dengan sebaran terbesar
+        dim, mid = int(spread.argmax()), (end - start) // 2
+        self.order[start:end] = idx[np.argpartition(pts[:, dim], mid)]
+        self.left[node] = self._build(start, start + mid, leaf_size)
+        self.right[node] = self._build(start + mid, end, leaf_size)
+        return node
+
+    def query(self, point, k, alive, harga_max=None):
+        """k tetangga terdekat di antara titik yang alive (dan harga < harga_max).
+
+        Mengembalikan list (jarak kuadrat, indeks titik), terurut menaik.
+        """
+        if not self.start:
+            return []
+        best = []  # max-heap berisi (-jarak, indeks)
+        frontier = [(0.0, 0)]  # min-heap (jarak minimum ke bounding box, simpul)
+        while frontier:
+            bound, node = heapq.heappop(frontier)
+            if len(best) == k and bound >= -best[0][0]:
+                break  # Semua simpul tersisa lebih jauh dari kandidat terburuk
+            if harga_max is not None and self.harga_min[node] >= harga_max:
+                continue
+            if self.left[node] == -1:
+                idx = self.order[self.start[node] : self.end[node]]
+                mask = alive[idx]
+                if harga_max is not None:
+                    mask &= self.harga[idx] < harga_max
+                idx = idx[mask]
+                dist = ((self.points[idx] - point) ** 2).sum(axis=1)
+                for d, i in zip(dist.tolist(), idx.tolist()):
+                    if len(best) < k:
+                        heapq.heappush(best, (-d, i))
+                    elif d < -best[0][0]:
+                        heapq.heapreplace(best, (-d, i))
+                continue
+            for child in (self.left[node], self.right[node]):
+                gap = np.maximum(self.lo[child] - point, 0) + np.maximum(
+                    point - self.hi[child], 0
+                )
+                heapq.heappush(frontier, (float((gap**2).sum()), child))
+        return sorted((-d, i) for d, i in best)
+
+
+class SimilarityIndex:
+    """Indeks kemiripan per pengguna yang mengikuti versi katalog secara inkremental."""
+
+    def __init__(self, kriteria=None, leaf_size=DEFAULT_LEAF_SIZE):
+        self.kriteria = list(kriteria or likert_config.keys())
+        self.leaf_size = leaf_size
+        self.versi = None
+        self._lock = threading.Lock()
+        self.rebuilds = 0
+        self._reset(np.empty(0, dtype=np.int64), np.empty((0, len(self.kriteria))))
+
+    def _reset(self, ids, raw):
+        """Membangun ulang pohon penuh dari seluruh katalog."""
+        urut = np.argsort(ids, kind="stable")  # Dicari dengan searchsorted
+        ids, raw = ids[urut], raw[urut]
+        self.min_val = np.nanmin(raw, axis=0) if len(raw) else None
+        self.max_val = np.nanmax(raw, axis=0) if len(raw) else None
+        self.ids, self.raw = ids, raw
+        self.tree = KDTree(self._normalize(raw), self._harga(raw), self.leaf_size)
+        self.alive = np.ones(len(ids), dtype=bool)
+        self.extra_ids, self.extra_raw = ids[:0], raw[:0]
+
+    def _normalize(self, raw):
+        """Normalisasi min-max seperti kolom n_* pada calculate_maut (NaN -> 0)."""
+        if self.min_val is None:
+            return raw
+        span = self.max_val - self.min_val
+        points = (raw - self.min_val) / np.where(span > 0, span, 1.0)
+        points[:, span == 0] = 1.0
+        return np.nan_to_num(points)
+
+    def _harga(self, raw):
+        if "harga" not in self.kriteria:
+            return np.zeros(len(raw))
+        # Harga kosong tidak pernah dianggap "lebih murah"
+        return np.nan_to_num(raw[:, self.kriteria.index("harga")], nan=np.inf)
+
+    def sync(
+        self, versi, load_df, load_changes=None, load_rows=None, load_extrema=None
+    ):
+        """Menyesuaikan indeks dengan versi katalog; load_df() hanya dipanggil jika basi.
+
+        load_changes(versi_lama) opsional mengembalikan entri jurnal perubahan
+        katalog (atau None jika tidak lengkap). Perubahan yang hanya menyentuh
+        kolom di luar kriteria (mis. nama) diabaikan. Jika load_rows(ids) dan
+        load_extrema(kriteria) juga diberikan, hanya baris yang berubah yang
+        dibaca selama min/max kriteria tidak bergeser; selain itu katalog
+        dimuat penuh dengan load_df().
+        """
+        with self._lock:
+            if versi == self.versi:
+                return
+            if self.versi is not None and load_changes is not None:
+                changes = load_changes(self.versi)
+                if changes is not None and self._apply_journal(
+                    changes, load_rows, load_extrema
+                ):
+                    self.versi = versi
+                    return
+            df = load_df()
+            ids = df["id"].to_numpy(dtype=np.int64)
+            raw = df[self.kriteria].to_numpy(dtype=float)
+            self.versi = versi
+            if not self._apply_changes(ids, raw):
+                self._reset(ids, raw)
+                self.rebuilds += 1
+
+    def _same_scale(self, min_val, max_val):
+        return np.array_equal(min_val, self.min_val, equal_nan=True) and (
+            np.array_equal(max_val, self.max_val, equal_nan=True)
+        )
+
+    def _match_tree(self, ids, raw):
+        """Posisi ids di pohon dan mask baris yang nilainya masih sama dengan pohon."""
+        pos = np.minimum(np.searchsorted(self.ids, ids), len(self.ids) - 1)
+        same = (self.ids[pos] == ids) & (
+            (self.raw[pos] == raw) | (np.isnan(self.raw[pos]) & np.isnan(raw))
+        ).all(axis=1)
+        return pos, same
+
+    def _apply_journal(self, changes, load_rows, load_extrema):
+        """Menerapkan entri jurnal dengan membaca baris yang berubah saja.
+
+        False jika katalog harus dimuat penuh (tidak ada loader, skala
+        berubah, atau perubahan terlalu banyak).
+        """
+        relevan = [
+            c
+            for c in changes
+            if c["aksi"] != "update" or set(c["kolom"]) & set(self.kriteria)
+        ]
+        if not relevan:
+            return True
+        if load_rows is None or load_extrema is None or self.min_val is None:
+            return False
+        changed = np.unique(
+            np.concatenate(
+                [np.asarray(expand_ids(c["row_ids"]), dtype=np.int64) for c in relevan]
+            )
+        )
+        if len(changed) > REBUILD_RATIO * len(self.ids):
+            return False
+        extrema = load_extrema(self.kriteria)
+        if not self._same_scale(
+            np.array([extrema[k][0] for k in self.kriteria], dtype=float),
+            np.array([extrema[k][1] for k in self.kriteria], dtype=float),
+        ):
+            return False
+
+        # Versi lama baris yang berubah dibuang dari pohon dan buffer
+        pos = np.minimum(np.searchsorted(self.ids, changed), len(self.ids) - 1)
+        alive = self.alive.copy()
+        alive[pos[self.ids[pos] == changed]] = False
+        keep = ~np.isin(self.extra_ids, changed)
+
+        # Baris yang masih ada (dan lolos batasan) masuk lagi
+        df = load_rows(changed.tolist())
+        ids = df["id"].to_numpy(dtype=np.int64)
+        raw = df[self.kriteria].to_numpy(dtype=float)
+        pos, same = self._match_tree(ids, raw)
+        alive[pos[same]] = True  # Kembali ke nilai yang ada di pohon
+        extra_ids = np.concatenate([self.extra_ids[keep], ids[~same]])
+        extra_raw = np.concatenate([self.extra_raw[keep], raw[~same]])
+        if (~alive).sum() + len(extra_ids) > REBUILD_RATIO * len(self.ids):
+            return False
+        self.alive, self.extra_ids, self.extra_raw = alive, extra_ids, extra_raw
+        return True
+
+    def _apply_changes(self, ids, raw):
+        """Pembaruan inkremental dari katalog penuh; False jika pohon harus
+        dibangun ulang penuh."""
+        if len(raw) == 0 or self.min_val is None:
+            return False
+        if not self._same_scale(np.nanmin(raw, axis=0), np.nanmax(raw, axis=0)):
+            return False
+
+        # Baris yang tidak berubah tetap di pohon; sisanya ke buffer
+        pos, same = self._match_tree(ids, raw)
+        alive = np.zeros(len(self.ids), dtype=bool)
+        alive[pos[same]] = True
+        if (~alive).sum() + (~same).sum() > REBUILD_RATIO * len(self.ids):
+            return False
+        self.alive = alive
+        self.extra_ids, self.extra_raw = ids[~same], raw[~same]
+        return True
+
+    def query(self, laptop_id, k=5, cheaper=False):
+        """k laptop paling mirip dengan laptop_id (tidak termasuk dirinya sendiri).
+
+        Dengan cheaper=True hanya laptop yang lebih murah yang dipertimbangkan.
+        Mengembalikan (array id, array jarak Euclid pada ruang ternormalisasi).
+        """
+        with self._lock:
+            in_extra = np.flatnonzero(self.extra_ids == laptop_id)
+            if len(in_extra):
+                raw = self.extra_raw[in_extra[0]]
+            else:
+                pos = np.searchsorted(self.ids, laptop_id)
+                # Baris yang sudah dihapus/berubah tetap ada di pohon sebagai baris mati
+                if (
+                    pos == len(self.ids)
+                    or self.ids[pos] != laptop_id
+                    or not self.alive[pos]
+                ):
+                    raise KeyError(laptop_id)
+                raw = self.raw[pos]
+            point = self._normalize(raw[None, :])[0]
+            harga_max = self._harga(raw[None, :])[0] if cheaper else None
+
+            alive = self.alive.copy()
+            pos = np.searchsorted(self.ids, laptop_id)
+            if pos < len(self.ids) and self.ids[pos] == laptop_id:
+                alive[pos] = False
+            hasil = [
+                (d, self.ids[i]) for d, i in self.tree.query(point, k, alive, harga_max)
+            ]
+
+            # Buffer perubahan dipindai langsung (ukurannya kecil)
+            mask = self.extra_ids != laptop_id
+            if harga_max is not None:
+                mask &= self._harga(self.extra_raw) < harga_max
+            dist = ((self._normalize(self.extra_raw[mask]) - point) ** 2).sum(axis=1)
+            hasil.extend(zip(dist.tolist(), self.extra_ids[mask].tolist()))
+
+            hasil = sorted(hasil)[:k]
+        return (
+            np.array([i for _, i in hasil], dtype=np.int64),
+            np.sqrt([d for d, _ in hasil]),
+        )
@@ -0,0 +1,470 @@
+# loadtest.py - Uji beban: simulasi N sesi pengguna bersamaan terhadap database SQLite
+#
+# Contoh pemakaian:
+#   python loadtest.py --users 20 --duration 30
+#   python loadtest.py --users 50 --mix results=50,import=20
+#
+# Setiap pengguna virtual adalah satu thread (sama seperti sesi Streamlit) yang
+# menjalankan beban kerja nyata aplikasi secara acak: login, impor Excel,
+# simpan hasil edit, ubah bobot, dan halaman hasil. Pola akses database meniru
+# web.py:
+#   pool        - lapisan storage.Storage (pool koneksi + transaksi), pola web.py
+#   shared      - satu koneksi & satu cursor global untuk semua sesi (pola lama)
+#   per-session - satu koneksi per sesi (mis. beberapa proses Streamlit)
+# Database yang diuji adalah salinan sementara, sehingga data asli tidak berubah.
+
+import argparse
+import multiprocessing
+import os
+import queue
+import random
+import shutil
+import sqlite3
+import tempfile
+import threading
+import time
+from collections import defaultdict
+
+import numpy as np
+import pandas as pd
+
+from spk import (
+    calculate_maut,
+    calculate_wp,
+    default_bobot,
+    get_skor,
+    get_tipe,
+    gpu_scores,
+    prosesor_scores,
+    rank_results,
+)
+from storage import SQLiteBackend, Storage
+from validasi import validate_upload
+
+DB_PATH = "laptop_spk_v2.db"
+DEFAULT_MIX = "login=15,import=10,edit=20,weights=15,results=40"
+
+PROSESOR = [
+    "Intel Core i5-1235U",
+    "Intel Core i7-12700H",
+    "AMD Ryzen 5 5600H",
+    "AMD Ryzen 7 7840HS",
+    "Apple M2",
+    "Intel Core Ultra 7 155H",
+]
+GPU = [
+    "Intel Iris Xe",
+    "NVIDIA RTX 4060",
+    "NVIDIA RTX 3050",
+    "AMD Radeon Graphics",
+    "Apple M2 8-core",
+    "NVIDIA GTX 1650",
+]
+
+
+def random_laptop(rng):
+    """Satu baris laptop sintetis dengan format yang sama seperti input pengguna."""
+    return {
+        "nama": f"Laptop {rng.randrange(10**6)}",
+        "harga": rng.randrange(5_000_000, 40_000_000, 100_000),
+        "ram": rng.choice([4, 8, 16, 32, 64]),
+        "storage": rng.choice([256, 512, 1024, 2048]),
+        "prosesor": rng.choice(PROSESOR),
+        "gpu": rng.choice(GPU),
+        "layar": rng.choice([13.3, 14.0, 15.6, 16.0, 17.3]),
+        "rating": round(rng.uniform(3, 5), 1),
+    }
+
+
+# ---------- Akses Database ----------
+class StorageSession:
+    """Sesi pengguna virtual yang memakai lapisan storage seperti web.py."""
+
+    def __init__(self, username, storage):
+        self.username = username
+        self.storage = storage
+
+    def insert_laptop(self, data):
+        self.storage.insert_laptop(self.username, data)
+
+    def insert_laptops(self, df):
+        self.storage.insert_laptops(self.username, df)
+
+    def get_user_laptops(self):
+        return self.storage.get_user_laptops(self.username)
+
+    def update_laptop_data(self, id_to_update, data):
+        self.storage.update_laptop_data(self.username, id_to_update, data)
+
+    def update_bobot(self, bobot_dict):
+        self.storage.update_bobot(self.username, bobot_dict)
+
+    def get_bobot(self):
+        return self.storage.get_bobot(self.username)
+
+    def get_catalog_version(self):
+        return self.storage.get_catalog_version(self.username)
+
+
+class Session:
+    """Sesi dengan koneksi/cursor mentah, meniru pola web.py sebelum storage.py."""
+
+    def __init__(self, username, conn, cursor):
+        self.username = username
+        self.conn = conn
+        self.c = cursor
+
+    def bump_catalog_version(self):
+        self.c.execute(
+            "INSERT INTO versi_katalog VALUES (?, 1) "
+            "ON CONFLICT(username) DO UPDATE SET versi = versi + 1",
+            (self.username,),
+        )
+
+    def insert_laptop(self, data):
+        self.c.execute(
+            "INSERT INTO laptops (username, nama, harga, ram, storage, prosesor, prosesor_skor, gpu, gpu_skor, layar, rating) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)",
+            (
+                self.username,
+                data["nama"],
+                data["harga"],
+                data["ram"],
+                data["storage"],
+                data["prosesor"],
+                get_skor(data["prosesor"], prosesor_scores),
+                data["gpu"],
+                get_skor(data["gpu"], gpu_scores),
+                data["layar"],
+                data["rating"],
+            ),
+        )
+        self.bump_catalog_version()
+        self.conn.commit()
+
+    def insert_laptops(self, df):
+        # Pola lama menu unggah Excel: satu insert + commit per baris
+        for _, row in df.iterrows():
+            self.insert_laptop(row)
+
+    def get_user_laptops(self):
+        return pd.read_sql(
+            "SELECT * FROM laptops WHERE username=?", self.conn, params=(self.username,)
+        )
+
+    def update_laptop_data(self, id_to_update, data):
+        self.c.execute(
+            "UPDATE laptops SET nama=?, harga=?, ram=?, storage=?, prosesor=?, prosesor_skor=?, gpu=?, gpu_skor=?, layar=?, rating=? WHERE id=? AND username=?",
+            (
+                data["nama"],
+                data["harga"],
+                data["ram"],
+                data["storage"],
+                data["prosesor"],
+                get_skor(data["prosesor"], prosesor_scores),
+                data["gpu"],
+                get_skor(data["gpu"], gpu_scores),
+                data["layar"],
+                data["rating"],
+                id_to_update,
+                self.username,
+            ),
+        )
+        self.bump_catalog_version()
+        self.conn.commit()
+
+    def update_bobot(self, bobot_dict):
+        self.c.execute("DELETE FROM bobot_kriteria WHERE username=?", (self.username,))
+        for k, v in bobot_dict.items():
+            self.c.execute(
+                "INSERT INTO bobot_kriteria VALUES (?, ?, ?, ?)",
+                (self.username, k, v, get_tipe(k)),
+            )
+        self.conn.commit()
+
+    def get_bobot(self):
+        rows = self.c.execute(
+            "SELECT kriteria, bobot, tipe FROM bobot_kriteria WHERE username=?",
+            (self.username,),
+        ).fetchall()
+        if not rows:
+            return dict(default_bobot), {k: get_tipe(k) for k in default_bobot}
+        return {k: b for k, b, _ in rows}, {k: t for k, _, t in rows}
+
+    def get_catalog_version(self):
+        row = self.c.execute(
+            "SELECT versi FROM versi_katalog WHERE username=?", (self.username,)
+        ).fetchone()
+        return row[0] if row else 0
+
+
+# ---------- Beban Kerja ----------
+def wl_login(s, rng, args):
+    s.get_bobot()
+    s.get_catalog_version()
+
+
+def wl_import(s, rng, args):
+    # Seperti menu unggah Excel: validasi per kolom lalu satu insert massal
+    df = pd.DataFrame([random_laptop(rng) for _ in range(args.import_rows)])
+    valid_df, _, _ = validate_upload(df)
+    s.insert_laptops(valid_df)
+
+
+def wl_edit(s, rng, args):
+    # Seperti "Simpan Perubahan": baca tabel lalu update baris yang berubah
+    df = s.get_user_laptops()
+    edited = df.sample(min(args.edit_rows, len(df)), random_state=rng.randrange(2**31))
+    for _, row in edited.iterrows():
+        data = row.to_dict()
+        data["harga"] = float(data["harga"]) * rng.uniform(0.9, 1.1)
+        s.update_laptop_data(int(row["id"]), data)
+
+
+def wl_weights(s, rng, args):
+    raw = {k: rng.uniform(0.05, 1) for k in default_bobot}
+    total = sum(raw.values())
+    s.update_bobot({k: v / total for k, v in raw.items()})
+
+
+def wl_results(s, rng, args):
+    s.get_catalog_version()
+    df = s.get_user_laptops()
+    if len(df) >= 2:
+        bobot, tipe = s.get_bobot()
+        rank_results(df, calculate_maut(df, bobot, tipe), calculate_wp(df, bobot, tipe))
+
+
+WORKLOADS = {
+    "login": wl_login,
+    "import": wl_import,
+    "edit": wl_edit,
+    "weights": wl_weights,
+    "results": wl_results,
+}
+
+
+# ---------- Penyiapan & Eksekusi ----------
+def prepare_database(source, n_users, rows_per_user, seed):
+    """Menyalin database ke file sementara dan mengisi data awal tiap pengguna virtual."""
+    tmp_dir = tempfile.mkdtemp(prefix="spk-loadtest-")
+    path = os.path.join(tmp_dir, "loadtest.db")
+    if source and os.path.exists(source):
+        # backup() juga menyalin isi WAL yang belum di-checkpoint
+        with sqlite3.connect(source) as src, sqlite3.connect(path) as dst:
+            src.backup(dst)
+    storage = Storage(SQLiteBackend(path), pool_size=1)
+    storage.setup_schema()
+    storage.close()
+    conn = sqlite3.connect(path)
+    rng = random.Random(seed)
+    s = Session(None, conn, conn.cursor())
+    for i in range(n_users):
+        s.username = f"loadtest_{i}"
+        for _ in range(rows_per_user):
+            s.insert_laptop(random_laptop(rng))
+    conn.close()
+    return path
+
+
+def parse_mix(mix):
+    weights = {}
+    for part in mix.split(","):
+        name, _, value = part.partition("=")
+        if name.strip() not in WORKLOADS:
+            raise ValueError(f"Beban kerja tidak dikenal: {name}")
+        weights[name.strip()] = float(value)
+    return weights
+
+
+class Recorder:
+    """Mengumpulkan latensi dan error per beban kerja dari semua thread."""
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.latencies = defaultdict(list)
+        self.errors = defaultdict(lambda: defaultdict(int))
+
+    def record(self, name, seconds, error=None):
+        with self.lock:
+            if error is None:
+                self.latencies[name].append(seconds)
+            else:
+                self.errors[name][error] += 1
+
+    def snapshot(self):
+        """Salinan data (bisa di-pickle) untuk dikirim ke proses induk."""
+        with self.lock:
+            return (
+                {k: list(v) for k, v in self.latencies.items()},
+                {k: dict(v) for k, v in self.errors.items()},
+            )
+
+
+def classify_error(exc):
+    msg = str(exc).lower()
+    if "locked" in msg or "busy" in msg:
+        return "database is locked"
+    return f"{type(exc).__name__}: {str(exc)[:60]}"
+
+
+def run_user(index, args, mix, make_session, recorder, stop_at):
+    rng = random.Random(args.seed * 1000 + index)
+    session = make_session(f"loadtest_{index % args.seed_users}")
+    names, weights = list(mix), list(mix.values())
+    while time.monotonic() < stop_at:
+        name = rng.choices(names, weights)[0]
+        start = time.perf_counter()
+        try:
+            WORKLOADS[name](session, rng, args)
+            recorder.record(name, time.perf_counter() - start)
+        except Exception as e:  # noqa: BLE001 - semua error dicatat, bukan dihentikan
+            recorder.record(name, time.perf_counter() - start, classify_error(e))
+        if args.think_time:
+            time.sleep(rng.expovariate(1 / args.think_time))
+
+
+def make_session_factory(mode, db_path, timeout, pool_size):
+    if mode == "pool":
+        storage = Storage(SQLiteBackend(db_path, busy_timeout=timeout), pool_size)
+        return lambda username: StorageSession(username, storage)
+    if mode == "shared":
+        # Pola web.py lama sebelum storage.Storage: satu koneksi & cursor global
+        # untuk semua sesi (sebagai pembanding; bisa crash di bawah beban)
+        conn = sqlite3.connect(db_path, check_same_thread=False, timeout=timeout)
+        cursor = conn.cursor()
+        return lambda username: Session(username, conn, cursor)
+    if mode == "per-session":
+        def factory(username):
+            conn = sqlite3.connect(db_path, check_same_thread=False, timeout=timeout)
+            return Session(username, conn, conn.cursor())
+
+        return factory
+    raise ValueError(f"Mode tidak dikenal: {mode}")
+
+
+def run_trial(args, mix, db_path, results):
+    """Dijalankan di proses anak: semua sesi virtual + kirim statistik berkala.
+
+    Proses terpisah diperlukan karena cursor yang dipakai bersama antar thread
+    (mode shared) bisa membuat interpreter crash (segfault), bukan sekadar error.
+    """
+    recorder = Recorder()
+    make_session = make_session_factory(
+        args.mode, db_path, args.timeout, args.pool_size
+    )
+    start = time.monotonic()
+    stop_at = start + args.duration
+    threads = [
+        threading.Thread(
+            target=run_user,
+            args=(i, args, mix, make_session, recorder, stop_at),
+            daemon=True,
+        )
+        for i in range(args.users)
+    ]
+    for t in threads:
+        t.start()
+    while any(t.is_alive() for t in threads):
+        time.sleep(0.25)
+        results.put((*recorder.snapshot(), time.monotonic() - start))
+    results.put((*recorder.snapshot(), time.monotonic() - start))
+
+
+def report(latencies, errors_by_name, elapsed):
+    """Mencetak throughput, persentil latensi, dan jumlah error per beban kerja."""
+    rows = []
+    for name in WORKLOADS:
+        lat = np.array(latencies.get(name, [])) * 1000
+        errors = errors_by_name.get(name, {})
+        n_err = sum(errors.values())
+        if not len(lat) and not n_err:
+            continue
+        pct = np.percentile(lat, [50, 95, 99]) if len(lat) else [np.nan] * 3
+        rows.append(
+            {
+                "beban": name,
+                "ok": len(lat),
+                "error": n_err,
+                "locked": errors.get("database is locked", 0),
+                "ops/dtk": len(lat) / elapsed,
+                "p50 ms": pct[0],
+                "p95 ms": pct[1],
+                "p99 ms": pct[2],
+                "max ms": lat.max() if len(lat) else np.nan,
+            }
+        )
+    df = pd.DataFrame(rows)
+    if df.empty:
+        print("Tidak ada operasi yang tercatat.")
+        return df
+    print(df.to_string(index=False, float_format=lambda v: f"{v:.1f}"))
+    total_ok, total_err = df["ok"].sum(), df["error"].sum()
+    print(
+        f"\nTotal: {total_ok} operasi sukses, {total_err} error "
+        f"({df['locked'].sum()} 'database is locked') dalam {elapsed:.1f} detik "
+        f"-> {total_ok / elapsed:.1f} ops/dtk"
+    )
+    other = {
+        err: n
+        for errs in errors_by_name.values()
+        for err, n in errs.items()
+        if err != "database is locked"
+    }
+    for err, n in sorted(other.items(), key=lambda item: -item[1]):
+        print(f"  {n:6d}x {err}")
+    return df
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Uji beban sesi bersamaan terhadap database SQLite aplikasi."
+    )
+    parser.add_argument("--db", default=DB_PATH, help="Database sumber (disalin)")
+    parser.add_argument("--users", type=int, default=10, help="Jumlah sesi bersamaan")
+    parser.add_argument("--duration", type=float, default=15, help="Durasi (detik)")
+    parser.add_argument(
+        "--mode", choices=["pool", "shared", "per-session"], default="pool"
+    )
+    parser.add_argument("--pool-size", type=int, default=8, help="Ukuran pool (mode pool)")
+    parser.add_argument("--mix", default=DEFAULT_MIX, help="Bobot beban kerja")
+    parser.add_argument("--rows", type=int, default=200, help="Laptop awal per pengguna")
+    parser.add_argument(
+        "--seed-users", type=int, default=None, help="Jumlah akun (default: --users)"
+    )
+    parser.add_argument("--import-rows", type=int, default=20)
+    parser.add_argument("--edit-rows", type=int, default=5)
+    parser.add_argument(
+        "--think-time", type=float, default=0.05, help="Jeda rata-rata (detik)"
+    )
+    parser.add_argument("--timeout", type=float, default=5.0, help="Timeout kunci SQLite")
+    parser.add_argument("--seed", type=int, default=42)
+    args = parser.parse_args()
+    args.seed_users = args.seed_users or args.users
+
+    mix = parse_mix(args.mix)
+    db_path = prepare_database(args.db, args.seed_users, args.rows, args.seed)
+    print(f"Database uji: {db_path} | mode={args.mode} | {args.users} sesi")
+
+    results = multiprocessing.Queue()
+    proc = multiprocessing.Process(target=run_trial, args=(args, mix, db_path, results))
+    proc.start()
+    latest = ({}, {}, 0.0)
+    while proc.is_alive() or not results.empty():
+        try:
+            latest = results.get(timeout=0.5)
+        except queue.Empty:
+            pass
+    proc.join()
+
+    latencies, errors, elapsed = latest
+    report(latencies, errors, max(elapsed, 1e-9))
+    if proc.exitcode != 0:
+        print(
+            f"\n!! Proses uji berhenti tidak normal (exit code {proc.exitcode}) "
+            f"setelah ~{elapsed:.1f} detik. Statistik di atas hanya sampai titik itu."
+        )
+    shutil.rmtree(os.path.dirname(db_path), ignore_errors=True)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,134 @@
+# ranking_cache.py - Cache hasil perankingan (LRU + batas memori, opsional disimpan lewat Storage)
+#
+# Kunci cache terdiri dari (username, versi katalog, hash bobot & tipe, versi
+# likert_config). Selama tidak ada yang berubah, halaman hasil dapat langsung
+# ditampilkan dari cache tanpa menjalankan calculate_maut / calculate_wp.
+#
+# Penyimpanan persisten memakai Storage (pool, transaksi & retry yang sama
+# dengan data lain) dan dijalankan di thread latar belakang, sehingga request
+# yang menghitung ranking tidak menunggu pickle dan tulis ke database.
+
+import hashlib
+import json
+import pickle
+import threading
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+
+DEFAULT_MAX_ENTRIES = 256
+DEFAULT_MAX_BYTES = 256 * 1024 * 1024  # 256 MB
+DEFAULT_MAX_PERSIST_BYTES = 16 * 1024 * 1024  # Batas payload per entri di database
+
+
+def hash_config(obj):
+    """Hash stabil untuk dict/list konfigurasi (urutan kunci tidak berpengaruh)."""
+    payload = json.dumps(obj, sort_keys=True, default=str).encode()
+    return hashlib.sha1(payload).hexdigest()[:16]
+
+
+def make_cache_key(username, catalog_version, bobot, tipe, likert_config, batasan=None):
+    """Menyusun kunci cache dari semua input yang memengaruhi hasil ranking."""
+    return "|".join(
+        [
+            username,
+            str(catalog_version),
+            hash_config({"bobot": bobot, "tipe": tipe, "batasan": batasan or {}}),
+            hash_config(likert_config),
+        ]
+    )
+
+
+def dump_payload(value, max_bytes=DEFAULT_MAX_PERSIST_BYTES):
+    """Pickle hasil untuk cache_peringkat; None jika melebihi max_bytes."""
+    payload = pickle.dumps(value, protocol=pickle.HIGHEST_PROTOCOL)
+    return payload if len(payload) <= max_bytes else None
+
+
+def estimate_size(value):
+    """Perkiraan ukuran (byte) dari dict berisi DataFrame."""
+    total = 0
+    for item in value.values():
+        if hasattr(item, "memory_usage"):
+            total += int(item.memory_usage(index=True, deep=True).sum())
+        else:
+            total += len(pickle.dumps(item))
+    return total
+
+
+class RankingCache:
+    """Cache LRU thread-safe untuk hasil ranking dengan batas jumlah entri dan memori."""
+
+    def __init__(
+        self,
+        max_entries=DEFAULT_MAX_ENTRIES,
+        max_bytes=DEFAULT_MAX_BYTES,
+        storage=None,
+        max_persist_bytes=DEFAULT_MAX_PERSIST_BYTES,
+    ):
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.storage = storage
+        self.max_persist_bytes = max_persist_bytes
+        self._entries = OrderedDict()  # key -> (value, size)
+        self._bytes = 0
+        self._lock = threading.Lock()
+        self.hits = self.misses = 0
+        # Satu thread penulis: urutan simpan per kunci tetap terjaga
+        self._writer = ThreadPoolExecutor(max_workers=1) if storage else None
+
+    # --- Penyimpanan persisten (opsional) ---
+    def _load_persisted(self, key):
+        payload = self.storage.get_cached_ranking(key)
+        return pickle.loads(payload) if payload is not None else None
+
+    def _persist(self, key, value):
+        # Hasil sangat besar hanya disimpan di memori (seperti max_bytes di _store)
+        payload = dump_payload(value, self.max_persist_bytes)
+        if payload is not None:
+            self.storage.save_cached_ranking(key, key.rsplit("|", 3)[0], payload)
+
+    # --- Operasi cache di memori ---
+    def _store(self, key, value):
+        size = estimate_size(value)
+        if size > self.max_bytes:
+            return
+        with self._lock:
+            if key in self._entries:
+                self._bytes -= self._entries.pop(key)[1]
+            self._entries[key] = (value, size)
+            self._bytes += size
+            while len(self._entries) > self.max_entries or self._bytes > self.max_bytes:
+                _, (_, old_size) = self._entries.popitem(last=False)
+                self._bytes -= old_size
+
+    def get(self, key):
+        """Mengambil hasil dari cache; None jika tidak ada."""
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return entry[0]
+        value = self._load_persisted(key) if self.storage else None
+        if value is None:
+            self.misses += 1
+            return None
+        self.hits += 1
+        self._store(key, value)
+        return value
+
+    def put(self, key, value):
+        """Menyimpan hasil ranking ke cache (dan ke database di latar belakang)."""
+        self._store(key, value)
+        if self._writer:
+            self._writer.submit(self._persist, key, value)
+
+    def stats(self):
+        """Statistik sederhana untuk ditampilkan/diagnosis."""
+        with self._lock:
+            return {
+                "entries": len(self._entries),
+                "bytes": self._bytes,
+                "hits": self.hits,
+                "misses": self.misses,
+            }
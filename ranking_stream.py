@@ -0,0 +1,111 @@
+# ranking_stream.py - Ranking out-of-core untuk katalog yang lebih besar dari memori
+#
+# Dua tahap, tanpa pernah memuat seluruh katalog sekaligus:
+#   1. Ekstrem (min/max) tiap kriteria untuk normalisasi MAUT, dihitung oleh
+#      database sebagai agregat (dilayani indeks (username, kriteria)).
+#   2. Baris dialirkan per potongan (chunk); tiap chunk diskor secara vektor dan
+#      hanya K kandidat terbaik per metode yang disimpan.
+# Memori puncak sebanding dengan chunk_size + K, tidak bergantung ukuran katalog.
+# Skor sama dengan jalur in-memory (calculate_maut/calculate_wp + rank_results)
+# hingga galat float, dan peringkat identik karena keduanya memberi peringkat
+# pada skor yang dibulatkan ke RANK_DECIMALS. Pada skor seri di batas ke-K, laptop
+# yang terpilih bisa berbeda, tetapi peringkatnya tetap sama.
+
+import numpy as np
+import pandas as pd
+
+from spk import RANK_DECIMALS, likert_array, likert_config, top_k
+
+DEFAULT_CHUNK_SIZE = 50_000
+# Di atas jumlah ini, ranking memakai jalur out-of-core (Top-K saja)
+OUT_OF_CORE_THRESHOLD = 200_000
+
+
+def score_chunk(df, extrema, bobot, tipe, config=None):
+    """Skor MAUT & WP untuk satu chunk memakai min/max global seluruh katalog."""
+    config = config or likert_config
+    skor_maut = np.zeros(len(df))
+    for k, w in bobot.items():
+        x = df[k].to_numpy(dtype=float)
+        min_val, max_val = extrema[k]
+        if min_val == max_val:
+            utilitas = np.ones(len(df))
+        elif tipe.get(k) == "cost":
+            utilitas = (max_val - x) / (max_val - min_val)
+        else:
+            utilitas = (x - min_val) / (max_val - min_val)
+        skor_maut += utilitas * w
+
+    total_bobot = sum(bobot.values())
+    log_wp = np.zeros(len(df))
+    for k, w in bobot.items():
+        w_norm = w / total_bobot if tipe.get(k) == "benefit" else -w / total_bobot
+        log_wp += w_norm * np.log(likert_array(df[k], **config[k]))
+    # Sama seperti rank_results: skor yang tidak terdefinisi dianggap 0
+    return np.nan_to_num(skor_maut), np.nan_to_num(np.exp(log_wp))
+
+
+def _merge_top(best, ids, names, scores, k):
+    """Menggabungkan kandidat chunk ke buffer Top-K (ukuran buffer tetap <= k)."""
+    if best is not None:
+        ids = np.concatenate([best[0], ids])
+        names = np.concatenate([best[1], names])
+        scores = np.concatenate([best[2], scores])
+    idx = top_k(scores, k)
+    return ids[idx], names[idx], scores[idx]
+
+
+def _min_rank(scores):
+    """Peringkat metode 'min' di dalam Top-K (skor sudah terurut menurun).
+
+    Semua laptop dengan skor lebih tinggi pasti ikut masuk Top-K, sehingga
+    peringkat ini sama dengan peringkat di seluruh katalog.
+    """
+    neg = -np.round(scores, RANK_DECIMALS)  # Pembulatan monoton: tetap terurut
+    return np.searchsorted(neg, neg, side="left") + 1
+
+
+def rank_out_of_core(
+    storage,
+    username,
+    bobot,
+    tipe,
+    batasan=None,
+    k=10,
+    chunk_size=DEFAULT_CHUNK_SIZE,
+    config=None,
+):
+    """Top-K MAUT dan WP dengan memori terbatas.
+
+    Mengembalikan ({"MAUT": DataFrame, "WP": DataFrame}, jumlah laptop dinilai).
+    """
+    kriteria = list(bobot.keys())
+    extrema = storage.get_extrema(username, kriteria, batasan)
+    best = {"MAUT": None, "WP": None}
+    total = 0
+    for chunk in storage.iter_user_laptops(
+        username, ["id", "nama", *kriteria], batasan, chunk_size
+    ):
+        total += len(chunk)
+        skor_maut, skor_wp = score_chunk(chunk, extrema, bobot, tipe, config)
+        ids, names = chunk["id"].to_numpy(), chunk["nama"].to_numpy(dtype=object)
+        best["MAUT"] = _merge_top(best["MAUT"], ids, names, skor_maut, k)
+        best["WP"] = _merge_top(best["WP"], ids, names, skor_wp, k)
+
+    hasil = {}
+    for metode, top in best.items():
+        if top is None:
+            hasil[metode] = pd.DataFrame(
+                columns=["id", "nama", f"Skor {metode}", f"Rank {metode}"]
+            )
+            continue
+        ids, names, scores = top
+        hasil[metode] = pd.DataFrame(
+            {
+                "id": ids,
+                "nama": names,
+                f"Skor {metode}": scores,
+                f"Rank {metode}": _min_rank(scores),
+            }
+        )
+    return hasil, total
@@ -0,0 +1,127 @@
+# sensitivitas.py - Analisis sensitivitas bobot & stabilitas ranking (tervektorisasi)
+#
+# Ribuan vektor bobot hasil perturbasi diskor sekaligus sebagai satu perkalian
+# matriks (W @ U.T) per potongan (chunk), memakai matriks dari
+# spk.build_score_matrices. Anggaran memori berlaku untuk semua chunk yang
+# diproses bersamaan: chunk dapat diproses paralel di beberapa thread (NumPy
+# melepas GIL saat matmul/sort), sehingga ukurannya dibagi jumlah worker.
+
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+import pandas as pd
+
+from spk import RANK_DECIMALS, used_criteria, weight_vector
+
+DEFAULT_MEM_BUDGET = 64 * 1024 * 1024  # byte untuk seluruh chunk yang berjalan
+MAX_WORKERS = 4  # Batas thread; lebih dari ini jarang mempercepat matmul/sort
+
+
+def perturb_weights(bobot_vec, n_samples, delta=0.05, seed=None):
+    """Membuat n_samples vektor bobot: tiap bobot digeser ±delta lalu dinormalisasi."""
+    rng = np.random.default_rng(seed)
+    shift = rng.uniform(-delta, delta, size=(n_samples, len(bobot_vec)))
+    weights = np.clip(bobot_vec + shift, 0.0, None)
+    weights[:, bobot_vec == 0] = 0.0  # Kriteria yang tidak dipakai tetap tidak dipakai
+    totals = weights.sum(axis=1, keepdims=True)
+    totals[totals == 0] = 1.0
+    return weights / totals
+
+
+def rank_rows(scores):
+    """Peringkat per baris (skor tertinggi = 1), seri mendapat peringkat minimum."""
+    # Pembulatan yang sama dengan rank_results (lihat spk.RANK_DECIMALS)
+    neg = -np.round(scores, RANK_DECIMALS)
+    order = np.argsort(neg, axis=1, kind="stable")
+    sorted_vals = np.take_along_axis(neg, order, axis=1)
+    n = scores.shape[1]
+    new_group = np.ones_like(sorted_vals, dtype=bool)
+    new_group[:, 1:] = sorted_vals[:, 1:] != sorted_vals[:, :-1]
+    group_start = np.maximum.accumulate(np.where(new_group, np.arange(n), 0), axis=1)
+    ranks = np.empty_like(order)
+    np.put_along_axis(ranks, order, group_start + 1, axis=1)
+    return ranks
+
+
+def _accumulate(ranks, k):
+    """Statistik parsial dari satu chunk peringkat (bisa dijumlahkan antar chunk)."""
+    return {
+        "n": ranks.shape[0],
+        "sum": ranks.sum(axis=0, dtype=np.int64),
+        "sumsq": (ranks.astype(np.int64) ** 2).sum(axis=0),
+        "min": ranks.min(axis=0),
+        "max": ranks.max(axis=0),
+        "top1": (ranks == 1).sum(axis=0),
+        "topk": (ranks <= k).sum(axis=0),
+    }
+
+
+def _merge(parts):
+    merged = dict(parts[0])
+    for part in parts[1:]:
+        for key in ("n", "sum", "sumsq", "top1", "topk"):
+            merged[key] = merged[key] + part[key]
+        merged["min"] = np.minimum(merged["min"], part["min"])
+        merged["max"] = np.maximum(merged["max"], part["max"])
+    return merged
+
+
+def _score_chunk(weights, matrices, k, used):
+    # Nilai kosong pada kriteria yang dipakai membuat skor 0, seperti score_matrices
+    maut = np.nan_to_num(weights[:, used] @ matrices["utilitas"][:, used].T)
+    # exp() monoton, jadi peringkat WP cukup dihitung dari log-skor
+    wp = weights @ matrices["log_likert"].T
+    return _accumulate(rank_rows(maut), k), _accumulate(rank_rows(wp), k)
+
+
+def analyze_sensitivity(
+    matrices,
+    bobot,
+    n_samples=2000,
+    delta=0.05,
+    k=3,
+    workers=1,
+    seed=None,
+    mem_budget=DEFAULT_MEM_BUDGET,
+):
+    """Distribusi peringkat tiap laptop di bawah perturbasi bobot, untuk MAUT dan WP.
+
+    Mengembalikan {"MAUT": DataFrame, "WP": DataFrame} berisi peringkat dasar,
+    rata-rata/simpangan/terbaik/terburuk, serta peluang menjadi #1 dan masuk Top-K.
+    """
+    base, used = weight_vector(matrices, bobot), used_criteria(matrices, bobot)
+    base = base / base.sum()
+    weights = perturb_weights(base, n_samples, delta, seed)
+
+    n_laptops = len(matrices["id"])
+    workers = max(1, min(workers, MAX_WORKERS))
+    # Perkiraan memori per baris sampel: skor, hasil sort, indeks & peringkat (8 byte).
+    # Hingga `workers` chunk hidup bersamaan, jadi anggaran dibagi rata.
+    chunk_size = max(1, int(mem_budget // workers // (n_laptops * 8 * 6)))
+    chunks = [weights[i : i + chunk_size] for i in range(0, n_samples, chunk_size)]
+    if workers > 1 and len(chunks) > 1:
+        with ThreadPoolExecutor(max_workers=workers) as pool:
+            parts = list(pool.map(lambda w: _score_chunk(w, matrices, k, used), chunks))
+    else:
+        parts = [_score_chunk(w, matrices, k, used) for w in chunks]
+
+    base_scores = _score_chunk(base[None, :], matrices, k, used)
+    hasil = {}
+    for i, metode in enumerate(["MAUT", "WP"]):
+        stats = _merge([p[i] for p in parts])
+        mean = stats["sum"] / stats["n"]
+        std = np.sqrt(np.maximum(stats["sumsq"] / stats["n"] - mean**2, 0.0))
+        hasil[metode] = pd.DataFrame(
+            {
+                "id": matrices["id"],
+                "nama": matrices["nama"],
+                "Rank Awal": base_scores[i]["min"],
+                "Rata-rata Rank": mean,
+                "Std Rank": std,
+                "Rank Terbaik": stats["min"],
+                "Rank Terburuk": stats["max"],
+                "P(#1)": stats["top1"] / stats["n"],
+                f"P(Top {k})": stats["topk"] / stats["n"],
+            }
+        ).sort_values(["Rank Awal", "Rata-rata Rank"], ignore_index=True)
+    return hasil
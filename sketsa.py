@@ -0,0 +1,115 @@
+# sketsa.py - Sketsa kuantil streaming untuk breakpoints Likert berbasis data katalog
+#
+# Sketsa berupa histogram logaritmik (gaya DDSketch): nilai x > 0 masuk ember
+# ceil(log_gamma(x)), sehingga setiap kuantil memiliki galat relatif <= alpha.
+# Karena isinya hanya hitungan per ember, sketsa bisa ditambah/dikurangi per
+# baris dan dua sketsa digabung dengan menjumlahkan hitungannya: pembaruan saat
+# insert/impor tidak pernah perlu mengurutkan seluruh tabel.
+
+import json
+import math
+
+import numpy as np
+
+DEFAULT_ALPHA = 0.01  # Galat relatif kuantil (1%)
+# Kuintil: setiap level Likert 1-5 berisi kira-kira 20% katalog
+KUANTIL_LIKERT = [0.2, 0.4, 0.6, 0.8]
+# Di bawah jumlah data ini breakpoints bawaan tetap dipakai
+MIN_DATA = 20
+
+
+class QuantileSketch:
+    """Sketsa kuantil yang bisa digabung (mergeable) dan dikurangi."""
+
+    def __init__(self, alpha=DEFAULT_ALPHA, counts=None, zero=0):
+        self.alpha = alpha
+        self.gamma = (1 + alpha) / (1 - alpha)
+        self._log_gamma = math.log(self.gamma)
+        self.counts = dict(counts or {})  # indeks ember -> jumlah nilai
+        self.zero = zero  # jumlah nilai <= 0
+
+    @property
+    def count(self):
+        return self.zero + sum(self.counts.values())
+
+    def _update(self, values, sign):
+        values = np.asarray(values, dtype=float)
+        values = values[~np.isnan(values)]
+        positive = values[values > 0]
+        self.zero += sign * (len(values) - len(positive))
+        buckets = np.ceil(np.log(positive) / self._log_gamma).astype(np.int64)
+        for key, n in zip(*(a.tolist() for a in np.unique(buckets, return_counts=True))):
+            total = self.counts.get(key, 0) + sign * n
+            if total > 0:
+                self.counts[key] = total
+            else:
+                self.counts.pop(key, None)
+
+    def add(self, values):
+        self._update(values, 1)
+
+    def remove(self, values):
+        """Mengurangi nilai yang pernah ditambahkan (untuk update/hapus data)."""
+        self._update(values, -1)
+
+    def merge(self, other):
+        if other.alpha != self.alpha:
+            raise ValueError("Sketsa dengan alpha berbeda tidak bisa digabung")
+        for key, n in other.counts.items():
+            self.counts[key] = self.counts.get(key, 0) + n
+        self.zero += other.zero
+        return self
+
+    def quantile(self, q, upper=False):
+        """Batas ember yang memuat kuantil q.
+
+        Batas bawah (default) dijamin <= semua nilai di ember tersebut dan batas
+        atas >= semuanya, sehingga nilai diskret (mis. RAM 8) tidak terpotong
+        oleh galat pembulatan sketsa.
+        """
+        rank = q * (self.count - 1)
+        seen = self.zero
+        if rank < seen:
+            return 0.0
+        for key in sorted(self.counts):
+            seen += self.counts[key]
+            if rank < seen:
+                return self.gamma ** (key if upper else key - 1)
+        return None
+
+    def to_json(self):
+        return json.dumps(
+            {
+                "alpha": self.alpha,
+                "zero": self.zero,
+                "counts": {str(k): n for k, n in self.counts.items()},
+            }
+        )
+
+    @classmethod
+    def from_json(cls, text):
+        data = json.loads(text)
+        counts = {int(k): n for k, n in data["counts"].items()}
+        return cls(data["alpha"], counts, data["zero"])
+
+
+def derive_likert_config(sketches, base_config):
+    """Membuat likert_config baru dengan breakpoints dari kuantil katalog.
+
+    Kriteria tanpa sketsa atau dengan data terlalu sedikit memakai breakpoints
+    dari base_config.
+    """
+    config = {}
+    for k, base in base_config.items():
+        sketch = sketches.get(k)
+        if sketch is None or sketch.count < MIN_DATA:
+            config[k] = base
+            continue
+        # Benefit: x >= breakpoint naik level -> batas bawah ember. Cost: x <= breakpoint
+        # naik level -> batas atas ember.
+        upper = not base["is_benefit"]
+        config[k] = {
+            "breakpoints": [sketch.quantile(q, upper) for q in KUANTIL_LIKERT],
+            "is_benefit": base["is_benefit"],
+        }
+    return config
@@ -0,0 +1,123 @@
+# snapshot.py - Snapshot kolumnar katalog laptop per pengguna (NumPy .npy + memory-map)
+#
+# Setiap kolom disimpan sebagai satu file .npy di folder
+#   <root>/<hash username>/v<versi katalog>/
+# sehingga pembacaan cukup memetakan file ke memori (np.load(mmap_mode="r"))
+# tanpa membangun DataFrame baris demi baris dari tuple SQLite. Snapshot dianggap
+# basi jika versinya berbeda dengan versi katalog saat ini; pemanggil kemudian
+# membaca dari SQLite dan menulis snapshot baru.
+
+import hashlib
+import json
+import os
+import shutil
+import tempfile
+
+import numpy as np
+import pandas as pd
+
+META_FILE = "meta.json"
+
+
+def _user_dir(root, username):
+    # Username di-hash agar aman dipakai sebagai nama folder
+    return os.path.join(root, hashlib.sha1(username.encode()).hexdigest()[:16])
+
+
+def _version_dir(root, username, versi):
+    return os.path.join(_user_dir(root, username), f"v{versi}")
+
+
+def _is_text(series):
+    return pd.api.types.is_object_dtype(series) or pd.api.types.is_string_dtype(series)
+
+
+def _encode_column(series):
+    """Mengubah satu kolom menjadi (array, mask null) yang bisa di-memory-map."""
+    if not _is_text(series):
+        array = series.to_numpy()
+        return (array, None) if array.dtype != object else (None, None)
+    nulls = series.isna().to_numpy()
+    values = series[~nulls]
+    if not all(isinstance(v, str) for v in values):
+        return None, None  # Campuran tipe (mis. angka tersimpan sebagai teks)
+    return series.fillna("").to_numpy(dtype=str), nulls if nulls.any() else None
+
+
+def save(root, username, versi, df):
+    """Menulis snapshot untuk versi katalog tertentu; versi lama dihapus.
+
+    Mengembalikan False jika DataFrame tidak bisa direpresentasikan secara kolumnar.
+    """
+    if df.empty:
+        return False
+    columns = {}
+    for col in df.columns:
+        array, nulls = _encode_column(df[col])
+        if array is None:
+            return False
+        columns[col] = (array, nulls)
+
+    user_dir = _user_dir(root, username)
+    os.makedirs(user_dir, exist_ok=True)
+    tmp_dir = tempfile.mkdtemp(dir=user_dir, prefix=".tmp-")
+    try:
+        meta = {"versi": versi, "rows": len(df), "columns": []}
+        for i, (col, (array, nulls)) in enumerate(columns.items()):
+            np.save(os.path.join(tmp_dir, f"{i}.npy"), array)
+            if nulls is not None:
+                np.save(os.path.join(tmp_dir, f"{i}.null.npy"), nulls)
+            meta["columns"].append(
+                {
+                    "name": col,
+                    "file": i,
+                    "dtype": str(df[col].dtype),
+                    "text": _is_text(df[col]),
+                    "nulls": nulls is not None,
+                }
+            )
+        with open(os.path.join(tmp_dir, META_FILE), "w") as f:
+            json.dump(meta, f)
+
+        target = _version_dir(root, username, versi)
+        try:
+            os.rename(tmp_dir, target)  # Atomik: pembaca tidak melihat snapshot setengah jadi
+        except OSError:
+            # Sesi lain sudah menulis versi yang sama (folder tujuan tidak kosong);
+            # isinya identik, jadi salinan ini cukup dibuang
+            if not os.path.isdir(target):
+                raise
+            shutil.rmtree(tmp_dir, ignore_errors=True)
+    except BaseException:
+        shutil.rmtree(tmp_dir, ignore_errors=True)
+        raise
+
+    # Bersihkan versi yang lebih lama saja: penulis lambat yang masih memegang
+    # versi lama tidak boleh menghapus snapshot lebih baru milik sesi lain
+    for name in os.listdir(user_dir):
+        if name.startswith("v") and name[1:].isdigit() and int(name[1:]) < versi:
+            shutil.rmtree(os.path.join(user_dir, name), ignore_errors=True)
+    return True
+
+
+def load(root, username, versi):
+    """Membaca snapshot dengan memory-map; None jika tidak ada atau sudah basi."""
+    path = _version_dir(root, username, versi)
+    try:
+        with open(os.path.join(path, META_FILE)) as f:
+            meta = json.load(f)
+        data = {}
+        for col in meta["columns"]:
+            array = np.load(os.path.join(path, f"{col['file']}.npy"), mmap_mode="r")
+            if col["text"]:
+                # Kolom teks harus menjadi string Python; hanya kolom angka yang zero-copy
+                array = array.astype(object)
+                if col["nulls"]:
+                    nulls = np.load(os.path.join(path, f"{col['file']}.null.npy"))
+                    array[nulls] = None
+                if col["dtype"] != "object":
+                    array = pd.array(array, dtype=col["dtype"])
+            data[col["name"]] = array
+    except (OSError, ValueError, KeyError):
+        return None
+    return pd.DataFrame(data, copy=False)
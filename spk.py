@@ -0,0 +1,285 @@
+# spk.py - Logika inti SPK (skoring komponen, MAUT, WP) tanpa ketergantungan Streamlit
+#
+# Dipisahkan dari web.py agar bisa dipakai ulang oleh proses batch (multiprocessing)
+# yang tidak menjalankan UI Streamlit.
+
+import re
+
+import numpy as np
+import pandas as pd
+
+# --- Skor untuk Kriteria Kualitatif ---
+prosesor_scores = {
+    # Intel Core Ultra - Pola paling spesifik diutamakan
+    r"core\s*ultra\s*9": 14,
+    r"core\s*ultra\s*7": 12,
+    r"core\s*ultra\s*5": 11,
+    # Apple Silicon
+    r"\bm4\b": 14,
+    r"\bm3\b": 13,
+    r"\bm2\b": 11,
+    r"\bm1\b": 9,
+    # AMD Ryzen - Mencocokkan seri spesifik
+    r"ryzen\s*9\s*\d{4}": 10,
+    r"ryzen\s*7\s*\d{4}": 8,
+    r"ryzen\s*5\s*\d{4}": 6,
+    r"ryzen\s*3\s*\d{4}": 4,
+    # Intel Core i - Mencocokkan seri spesifik
+    r"i9-?\d{4,5}": 10,
+    r"i7-?\d{4,5}": 8,
+    r"i5-?\d{4,5}": 6,
+    r"i3-?\d{4,5}": 4,
+    # Pola fallback yang lebih umum
+    r"ryzen\s*9": 10,
+    r"ryzen\s*7": 8,
+    r"ryzen\s*5": 6,
+    r"ryzen\s*3": 4,
+    r"\bi9\b": 10,
+    r"\bi7\b": 8,
+    r"\bi5\b": 6,
+    r"\bi3\b": 4,
+    # Lainnya
+    r"snapdragon": 7,
+    r"mediatek": 5,
+}
+
+gpu_scores = {
+    # NVIDIA GeForce RTX 40 Series
+    r"rtx\s*4090": 14,
+    r"rtx\s*4080": 13,
+    r"rtx\s*4070": 12,
+    r"rtx\s*4060": 11,
+    r"rtx\s*4050": 10,
+    # NVIDIA GeForce RTX 30 Series
+    r"rtx\s*3080": 12,
+    r"rtx\s*3070": 11,
+    r"rtx\s*3060": 10,
+    r"rtx\s*3050": 9,
+    # NVIDIA GeForce RTX 20 Series & GTX
+    r"rtx\s*2050": 8,
+    r"gtx\s*1660": 7,
+    r"gtx\s*1650": 7,
+    # NVIDIA MX
+    r"mx\s*\d{2,3}": 6,  # MX550, MX450 etc.
+    # AMD Radeon RX
+    r"rx\s*7\d{3}": 9,  # RX 7000 series
+    r"rx\s*6\d{3}": 7,  # RX 6000 series
+    # Apple Integrated
+    r"apple\s*m4": 14,
+    r"apple\s*m3": 12,
+    r"apple\s*m2": 10,
+    r"apple\s*m1": 8,
+    # Intel Integrated
+    r"intel\s*arc": 5.5,
+    r"iris\s*xe": 4,
+    r"uhd\s*graphics": 3,
+    # AMD Integrated (paling umum)
+    r"amd\s*radeon\s*graphics": 5,
+    r"amd\s*radeon": 5,
+}
+
+
+# PERBAIKAN: Fungsi get_skor sekarang menggunakan regex
+def get_skor(nama, skor_dict):
+    nama_lower = str(nama).lower()
+    # Mengurutkan berdasarkan panjang pola regex (terpanjang/paling spesifik dulu)
+    for pattern, score in sorted(
+        skor_dict.items(), key=lambda item: len(item[0]), reverse=True
+    ):
+        if re.search(pattern, nama_lower):
+            return score
+    return 5  # Skor default jika tidak ada kecocokan ditemukan
+
+
+# --- Bobot default jika pengguna belum menyimpan bobot ---
+default_bobot = {
+    "harga": 0.25,
+    "ram": 0.15,
+    "storage": 0.10,
+    "prosesor_skor": 0.20,
+    "gpu_skor": 0.20,
+    "layar": 0.05,
+    "rating": 0.05,
+}
+
+
+def get_tipe(kriteria):
+    """Menentukan tipe kriteria: harga adalah cost, lainnya benefit."""
+    return "cost" if kriteria == "harga" else "benefit"
+
+
+def to_likert_generic(value, breakpoints, is_benefit=True):
+    """Fungsi generik untuk konversi ke skala Likert (1-5)."""
+    # Breakpoints diurutkan dari nilai terendah ke tertinggi
+    if is_benefit:  # Semakin tinggi nilai, semakin bagus skornya
+        if value >= breakpoints[3]:
+            return 5
+        if value >= breakpoints[2]:
+            return 4
+        if value >= breakpoints[1]:
+            return 3
+        if value >= breakpoints[0]:
+            return 2
+        return 1
+    else:  # Semakin rendah nilai, semakin bagus skornya (contoh: harga)
+        if value <= breakpoints[0]:
+            return 5
+        if value <= breakpoints[1]:
+            return 4
+        if value <= breakpoints[2]:
+            return 3
+        if value <= breakpoints[3]:
+            return 2
+        return 1
+
+
+# --- Konfigurasi untuk konversi Likert ---
+likert_config = {
+    "harga": {"breakpoints": [7e6, 12e6, 18e6, 25e6], "is_benefit": False},
+    "ram": {"breakpoints": [4, 8, 16, 32], "is_benefit": True},
+    "storage": {"breakpoints": [256, 512, 1024, 2048], "is_benefit": True},
+    "prosesor_skor": {"breakpoints": [5, 7, 9, 12], "is_benefit": True},
+    "gpu_skor": {"breakpoints": [5, 7, 9, 12], "is_benefit": True},
+    "layar": {"breakpoints": [14, 15, 16, 17], "is_benefit": True},
+    "rating": {"breakpoints": [2, 3, 4, 4.5], "is_benefit": True},
+}
+
+
+def build_batasan_clause(batasan):
+    """Menyusun predikat SQL (dan parameternya) dari batasan {kriteria: (min, max)}."""
+    clauses, params = [], []
+    for k, (min_val, max_val) in (batasan or {}).items():
+        if k not in likert_config:  # Nama kolom hanya dari daftar kriteria yang dikenal
+            continue
+        if min_val is not None:
+            clauses.append(f"{k} >= ?")
+            params.append(min_val)
+        if max_val is not None:
+            clauses.append(f"{k} <= ?")
+            params.append(max_val)
+    return "".join(f" AND {cl}" for cl in clauses), params
+
+
+def calculate_maut(df, bobot, tipe):
+    """Menghitung skor MAUT menggunakan normalisasi Min-Max."""
+    df_maut = df.copy()
+    for k in bobot.keys():
+        n_k_col, x = f"n_{k}", df_maut[k]
+        min_val, max_val = x.min(), x.max()
+        if min_val == max_val:
+            df_maut[n_k_col] = 1.0
+        else:
+            if tipe.get(k) == "cost":
+                df_maut[n_k_col] = (max_val - x) / (max_val - min_val)
+            else:
+                df_maut[n_k_col] = (x - min_val) / (max_val - min_val)
+
+    df_maut["Skor MAUT"] = sum(df_maut[f"n_{k}"] * w for k, w in bobot.items())
+    return df_maut
+
+
+def calculate_wp(df, bobot, tipe, config=None):
+    """Menghitung skor WP menggunakan skala Likert.
+
+    config menggantikan likert_config bawaan (mis. breakpoints dari kuantil katalog).
+    """
+    df_wp = df.copy()
+    for k, cfg in (config or likert_config).items():
+        df_wp[f"likert_{k}"] = df_wp[k].apply(lambda x: to_likert_generic(x, **cfg))
+
+    total_bobot = sum(bobot.values())
+    bobot_norm_wp = {
+        k: (w / total_bobot if tipe.get(k) == "benefit" else -w / total_bobot)
+        for k, w in bobot.items()
+    }
+
+    df_wp["Skor WP"] = 1.0
+    for k, w_norm in bobot_norm_wp.items():
+        likert_values = df_wp[f"likert_{k}"].replace(0, 1)  # Hindari pangkat 0
+        df_wp["Skor WP"] *= likert_values**w_norm
+    return df_wp
+
+
+# Skor dibulatkan sebelum diberi peringkat agar skor yang identik secara matematis
+# tidak terpisah oleh galat float (urutan penjumlahan berbeda antar jalur hitung)
+RANK_DECIMALS = 12
+
+
+def rank_results(df, df_maut, df_wp):
+    """Menggabungkan skor MAUT dan WP lalu menghitung peringkat masing-masing."""
+    results = df[["id", "nama"]].copy()
+    results = pd.merge(results, df_maut[["id", "Skor MAUT"]], on="id", how="left")
+    results = pd.merge(results, df_wp[["id", "Skor WP"]], on="id", how="left")
+    results.fillna(0, inplace=True)
+    for metode in ["MAUT", "WP"]:
+        skor = results[f"Skor {metode}"].round(RANK_DECIMALS)
+        results[f"Rank {metode}"] = skor.rank(ascending=False, method="min").astype(int)
+    return results
+
+
+# --- Matriks Skor (untuk re-ranking cepat saat bobot berubah) ---
+def likert_array(values, breakpoints, is_benefit=True):
+    """Versi vektor dari to_likert_generic untuk satu kolom."""
+    values = np.asarray(values, dtype=float)
+    if is_benefit:
+        likert = np.searchsorted(breakpoints, values, side="right") + 1
+    else:
+        likert = 5 - np.searchsorted(breakpoints, values, side="left")
+    return np.where(np.isnan(values), 1, likert)  # NaN selalu gagal semua perbandingan
+
+
+def build_score_matrices(df, tipe, kriteria=None, config=None):
+    """Menyiapkan matriks utilitas MAUT dan log-Likert WP sekali per katalog.
+
+    Bagian yang tidak bergantung pada bobot dihitung di sini, sehingga skor untuk
+    bobot apa pun cukup dihitung dengan satu perkalian matriks-vektor
+    (lihat score_matrices).
+    """
+    config = config or likert_config
+    kriteria = list(kriteria or config.keys())
+    x = df[kriteria].to_numpy(dtype=float)
+    min_val, max_val = np.nanmin(x, axis=0), np.nanmax(x, axis=0)
+    span = np.where(max_val > min_val, max_val - min_val, 1.0)
+    is_cost = np.array([tipe.get(k) == "cost" for k in kriteria])
+    utilitas = np.where(is_cost, max_val - x, x - min_val) / span
+    utilitas[:, max_val == min_val] = 1.0
+
+    log_likert = np.column_stack(
+        [np.log(likert_array(df[k], **config[k])) for k in kriteria]
+    )
+    # Eksponen WP bernilai negatif untuk kriteria cost (sama seperti calculate_wp)
+    log_likert *= np.where(is_cost, -1.0, 1.0)
+    return {
+        "kriteria": kriteria,
+        "id": df["id"].to_numpy(),
+        "nama": df["nama"].to_numpy(),
+        # NaN dipertahankan: nilai kosong membuat skor total 0 (lihat score_matrices)
+        "utilitas": utilitas,
+        "log_likert": log_likert,
+    }
+
+
+def weight_vector(matrices, bobot):
+    """Mengubah dict bobot menjadi vektor sesuai urutan kriteria matriks."""
+    return np.array([bobot.get(k, 0.0) for k in matrices["kriteria"]], dtype=float)
+
+
+def used_criteria(matrices, bobot):
+    """Mask kolom matriks yang termasuk dalam bobot (seperti iterasi calculate_maut)."""
+    return np.array([k in bobot for k in matrices["kriteria"]])
+
+
+def score_matrices(matrices, bobot):
+    """Menghitung skor MAUT dan WP untuk satu set bobot (tanpa menyentuh DataFrame)."""
+    w, used = weight_vector(matrices, bobot), used_criteria(matrices, bobot)
+    # Sama seperti calculate_maut + rank_results: kriteria kosong -> skor total 0
+    skor_maut = np.nan_to_num(matrices["utilitas"][:, used] @ w[used])
+    skor_wp = np.exp(matrices["log_likert"] @ (w / w.sum()))
+    return skor_maut, skor_wp
+
+
+def top_k(scores, k):
+    """Indeks k skor tertinggi, terurut menurun (argpartition, bukan sort penuh)."""
+    k = min(k, len(scores))
+    idx = np.argpartition(-scores, k - 1)[:k]
+    return idx[np.argsort(-scores[idx], kind="stable")]
@@ -0,0 +1,1063 @@
+# storage.py - Lapisan penyimpanan: pool koneksi, transaksi dengan retry, dan backend
+#
+# Menggantikan satu koneksi + cursor global yang sebelumnya dipakai bersama oleh
+# semua sesi Streamlit. Setiap operasi meminjam koneksi dari pool berukuran
+# terbatas, memakai cursor miliknya sendiri, lalu mengembalikannya. Operasi tulis
+# berjalan di dalam transaksi eksplisit yang diulang otomatis bila database sibuk.
+#
+# UI (web.py) hanya mengenal kelas Storage. Backend lain (mis. server database
+# lokal) cukup mengimplementasikan antarmuka Backend tanpa mengubah kode UI.
+#
+# Batasan: yang diabstraksikan Backend hanya koneksi, awal transaksi, deteksi
+# "sibuk", dan skema. Query di Storage masih memakai dialek SQLite: pencarian
+# FTS5 (`laptops_fts MATCH ?` dan kolom `rank`) serta upsert `ON CONFLICT ... DO
+# UPDATE` dengan `excluded`. Backend lain harus menyediakan padanannya (upsert
+# yang sama dikenal PostgreSQL, pencarian full-text tidak) atau menimpa metode
+# Storage yang bersangkutan.
+
+import abc
+import queue
+import random
+import re
+import sqlite3
+import threading
+import time
+from contextlib import contextmanager
+
+import pandas as pd
+
+import snapshot
+from sketsa import QuantileSketch, derive_likert_config
+from spk import (
+    build_batasan_clause,
+    default_bobot,
+    get_skor,
+    get_tipe,
+    gpu_scores,
+    likert_config,
+    prosesor_scores,
+)
+
+SEARCH_LIMIT = 500
+JOURNAL_KEEP = 1000  # Entri jurnal perubahan yang disimpan per pengguna
+# Kolom tabel laptops yang ditulis aplikasi (urutan hasil Storage._laptop_values)
+LAPTOP_COLUMNS = [
+    "nama",
+    "harga",
+    "ram",
+    "storage",
+    "prosesor",
+    "prosesor_skor",
+    "gpu",
+    "gpu_skor",
+    "layar",
+    "rating",
+]
+
+
+class StorageBusyError(RuntimeError):
+    """Database tetap sibuk setelah semua percobaan ulang habis."""
+
+
+# ---------- Backend ----------
+class Backend(abc.ABC):
+    """Antarmuka backend database (DB-API 2.0, paramstyle qmark)."""
+
+    @abc.abstractmethod
+    def connect(self):
+        """Membuka satu koneksi baru."""
+
+    def begin(self, conn):
+        """Memulai transaksi tulis."""
+        conn.execute("BEGIN")
+
+    def is_busy(self, exc):
+        """True jika exception berarti database sedang dikunci/sibuk (boleh diulang)."""
+        return False
+
+    @abc.abstractmethod
+    def setup_schema(self, conn):
+        """Membuat tabel, indeks, dan objek pendukung jika belum ada."""
+
+
+class SQLiteBackend(Backend):
+    """Backend SQLite dengan mode WAL (pembaca tidak terblokir oleh penulis)."""
+
+    def __init__(self, path, busy_timeout=5.0):
+        self.path = path
+        self.busy_timeout = busy_timeout
+
+    def connect(self):
+        # isolation_level=None: transaksi dikendalikan eksplisit oleh Storage.
+        # check_same_thread=False aman karena pool menjamin satu koneksi hanya
+        # dipakai satu thread pada satu waktu.
+        conn = sqlite3.connect(
+            self.path,
+            timeout=self.busy_timeout,
+            isolation_level=None,
+            check_same_thread=False,
+        )
+        conn.execute("PRAGMA journal_mode=WAL")
+        conn.execute("PRAGMA synchronous=NORMAL")
+        return conn
+
+    def begin(self, conn):
+        # IMMEDIATE mengambil kunci tulis di awal, sehingga tidak ada deadlock
+        # saat dua transaksi sama-sama ingin naik dari baca ke tulis.
+        conn.execute("BEGIN IMMEDIATE")
+
+    def is_busy(self, exc):
+        return isinstance(exc, sqlite3.OperationalError) and (
+            "locked" in str(exc) or "busy" in str(exc)
+        )
+
+    def setup_schema(self, conn):
+        conn.execute(
+            """
+        CREATE TABLE IF NOT EXISTS laptops (
+            id INTEGER PRIMARY KEY AUTOINCREMENT, username TEXT, nama TEXT,
+            harga REAL, ram INTEGER, storage INTEGER, prosesor TEXT, prosesor_skor INTEGER,
+            gpu TEXT, gpu_skor INTEGER, layar REAL, rating REAL
+        )"""
+        )
+        conn.execute(
+            """
+        CREATE TABLE IF NOT EXISTS bobot_kriteria (
+            username TEXT, kriteria TEXT, bobot REAL, tipe TEXT,
+            PRIMARY KEY (username, kriteria)
+        )"""
+        )
+        conn.execute(
+            """
+        CREATE TABLE IF NOT EXISTS versi_katalog (
+            username TEXT PRIMARY KEY, versi INTEGER
+        )"""
+        )
+        conn.execute(
+            """
+        CREATE TABLE IF NOT EXISTS batasan_kriteria (
+            username TEXT, kriteria TEXT, min_val REAL, max_val REAL,
+            PRIMARY KEY (username, kriteria)
+        )"""
+        )
+        conn.execute(
+            """
+        CREATE TABLE IF NOT EXISTS sketsa_kuantil (
+            username TEXT, kriteria TEXT, data TEXT,
+            PRIMARY KEY (username, kriteria)
+        )"""
+        )
+        conn.execute(
+            """
+        CREATE TABLE IF NOT EXISTS pengaturan_pengguna (
+            username TEXT PRIMARY KEY, likert_otomatis INTEGER NOT NULL DEFAULT 0
+        )"""
+        )
+        conn.execute(
+            """
+        CREATE TABLE IF NOT EXISTS cache_peringkat (
+            cache_key TEXT PRIMARY KEY, username TEXT, payload BLOB, dibuat_pada REAL
+        )"""
+        )
+        # Diisi batch_refresh.py: peringkat lengkap per pengguna yang bisa di-query
+        conn.execute(
+            """
+        CREATE TABLE IF NOT EXISTS hasil_rekomendasi (
+            username TEXT, laptop_id INTEGER, nama TEXT,
+            skor_maut REAL, rank_maut INTEGER, skor_wp REAL, rank_wp INTEGER,
+            dihitung_pada REAL,
+            PRIMARY KEY (username, laptop_id)
+        )"""
+        )
+        conn.execute(
+            """
+        CREATE TABLE IF NOT EXISTS jurnal_perubahan (
+            seq INTEGER PRIMARY KEY AUTOINCREMENT,
+            username TEXT, versi INTEGER, tabel TEXT, aksi TEXT,
+            row_ids TEXT, kolom TEXT, dibuat_pada REAL
+        )"""
+        )
+        conn.execute(
+            "CREATE INDEX IF NOT EXISTS idx_jurnal_username ON jurnal_perubahan (username, seq)"
+        )
+        # Indeks (username, kriteria) agar batasan bisa dievaluasi sebagai range scan
+        for k in likert_config.keys():
+            conn.execute(
+                f"CREATE INDEX IF NOT EXISTS idx_laptops_{k} ON laptops (username, {k})"
+            )
+        self._setup_search_index(conn)
+
+    def _setup_search_index(self, conn):
+        """Indeks FTS5 atas nama, prosesor, dan gpu beserta trigger sinkronisasinya."""
+        fts_exists = conn.execute(
+            "SELECT 1 FROM sqlite_master WHERE type='table' AND name='laptops_fts'"
+        ).fetchone()
+        conn.execute(
+            """
+        CREATE VIRTUAL TABLE IF NOT EXISTS laptops_fts USING fts5(
+            nama, prosesor, gpu, content='laptops', content_rowid='id'
+        )"""
+        )
+        # Trigger menjaga indeks tetap sinkron untuk setiap INSERT/UPDATE/DELETE
+        # yang dijalankan oleh fungsi-fungsi CRUD.
+        conn.execute(
+            """
+        CREATE TRIGGER IF NOT EXISTS laptops_fts_ai AFTER INSERT ON laptops BEGIN
+            INSERT INTO laptops_fts(rowid, nama, prosesor, gpu)
+            VALUES (new.id, new.nama, new.prosesor, new.gpu);
+        END"""
+        )
+        conn.execute(
+            """
+        CREATE TRIGGER IF NOT EXISTS laptops_fts_ad AFTER DELETE ON laptops BEGIN
+            INSERT INTO laptops_fts(laptops_fts, rowid, nama, prosesor, gpu)
+            VALUES ('delete', old.id, old.nama, old.prosesor, old.gpu);
+        END"""
+        )
+        conn.execute(
+            """
+        CREATE TRIGGER IF NOT EXISTS laptops_fts_au AFTER UPDATE OF nama, prosesor, gpu
+        ON laptops BEGIN
+            INSERT INTO laptops_fts(laptops_fts, rowid, nama, prosesor, gpu)
+            VALUES ('delete', old.id, old.nama, old.prosesor, old.gpu);
+            INSERT INTO laptops_fts(rowid, nama, prosesor, gpu)
+            VALUES (new.id, new.nama, new.prosesor, new.gpu);
+        END"""
+        )
+        if not fts_exists:
+            # Database lama: isi indeks dari data yang sudah ada
+            conn.execute("INSERT INTO laptops_fts(laptops_fts) VALUES ('rebuild')")
+
+
+# ---------- Pool Koneksi ----------
+class ConnectionPool:
+    """Pool koneksi berukuran terbatas; koneksi dibuat saat pertama dibutuhkan."""
+
+    def __init__(self, backend, max_size=8, acquire_timeout=30.0):
+        self.backend = backend
+        self.max_size = max_size
+        self.acquire_timeout = acquire_timeout
+        self._idle = queue.LifoQueue()
+        self._created = 0
+        self._lock = threading.Lock()
+
+    def acquire(self):
+        """Meminjam koneksi; membuat baru jika pool belum penuh, atau menunggu."""
+        deadline = time.monotonic() + self.acquire_timeout
+        while True:
+            try:
+                return self._idle.get_nowait()
+            except queue.Empty:
+                pass
+            with self._lock:
+                can_create = self._created < self.max_size
+                if can_create:
+                    self._created += 1
+            if can_create:
+                try:
+                    return self.backend.connect()
+                except BaseException:
+                    with self._lock:
+                        self._created -= 1
+                    raise
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                raise StorageBusyError(
+                    f"Tidak ada koneksi bebas dalam {self.acquire_timeout} detik"
+                )
+            # Tunggu sebentar lalu periksa lagi (slot bisa kosong bila ada koneksi dibuang)
+            try:
+                return self._idle.get(timeout=min(remaining, 0.1))
+            except queue.Empty:
+                pass
+
+    def release(self, conn):
+        self._idle.put(conn)
+
+    def discard(self, conn):
+        """Membuang koneksi yang rusak agar slotnya bisa dipakai koneksi baru."""
+        try:
+            conn.close()
+        finally:
+            with self._lock:
+                self._created -= 1
+
+    def close(self):
+        while True:
+            try:
+                self._idle.get_nowait().close()
+            except queue.Empty:
+                break
+
+
+# ---------- Storage ----------
+class Storage:
+    """Semua operasi baca/tulis aplikasi, dengan username eksplisit per operasi."""
+
+    def __init__(
+        self, backend, pool_size=8, retries=5, retry_delay=0.05, snapshot_dir=None
+    ):
+        self.backend = backend
+        self.pool = ConnectionPool(backend, pool_size)
+        self.retries = retries
+        self.retry_delay = retry_delay
+        self.snapshot_dir = snapshot_dir
+
+    # --- Lingkup koneksi & transaksi ---
+    @contextmanager
+    def connection(self):
+        """Meminjam satu koneksi untuk operasi baca."""
+        conn = self.pool.acquire()
+        try:
+            yield conn
+        finally:
+            if getattr(conn, "in_transaction", False):
+                # Transaksi menggantung (mis. COMMIT gagal): batalkan sebelum
+                # dikembalikan, atau buang koneksinya jika rollback pun gagal.
+                try:
+                    conn.execute("ROLLBACK")
+                except Exception:
+                    self.pool.discard(conn)
+                    conn = None
+            if conn is not None:
+                self.pool.release(conn)
+
+    @contextmanager
+    def transaction(self):
+        """Satu transaksi tulis: commit jika sukses, rollback jika gagal."""
+        with self.connection() as conn:
+            self.backend.begin(conn)
+            try:
+                yield conn
+            except BaseException:
+                conn.execute("ROLLBACK")
+                raise
+            conn.execute("COMMIT")
+
+    def run_in_transaction(self, fn, *args):
+        """Menjalankan fn(conn, *args) dalam transaksi; diulang jika database sibuk."""
+        for attempt in range(self.retries + 1):
+            try:
+                with self.transaction() as conn:
+                    return fn(conn, *args)
+            except Exception as e:
+                if not self.backend.is_busy(e) or attempt == self.retries:
+                    if self.backend.is_busy(e):
+                        raise StorageBusyError(str(e)) from e
+                    raise
+            # Backoff eksponensial dengan jitter agar penulis tidak bertabrakan lagi
+            time.sleep(self.retry_delay * (2**attempt) * random.uniform(0.5, 1.5))
+
+    def setup_schema(self):
+        self.run_in_transaction(self.backend.setup_schema)
+
+    # --- Versi Katalog (untuk invalidasi cache) ---
+    @staticmethod
+    def _bump_catalog_version(conn, username):
+        conn.execute(
+            "INSERT INTO versi_katalog VALUES (?, 1) "
+            "ON CONFLICT(username) DO UPDATE SET versi = versi + 1",
+            (username,),
+        )
+
+    def get_catalog_version(self, username):
+        with self.connection() as conn:
+            row = conn.execute(
+                "SELECT versi FROM versi_katalog WHERE username=?", (username,)
+            ).fetchone()
+        return row[0] if row else 0
+
+    # --- Sketsa Kuantil (breakpoints Likert otomatis) ---
+    def _load_sketches(self, conn, username):
+        """Sketsa per kriteria; dibangun dari tabel (per chunk) jika belum ada."""
+        rows = conn.execute(
+            "SELECT kriteria, data FROM sketsa_kuantil WHERE username=?", (username,)
+        ).fetchall()
+        sketches = {k: QuantileSketch.from_json(data) for k, data in rows}
+        if set(sketches) == set(likert_config):
+            return sketches
+        # Data lama sebelum ada sketsa: isi sekali dari tabel laptops
+        sketches = {k: QuantileSketch() for k in likert_config}
+        kriteria = list(likert_config)
+        cursor = conn.execute(
+            f"SELECT {', '.join(kriteria)} FROM laptops WHERE username=?", (username,)
+        )
+        while rows := cursor.fetchmany(50_000):
+            values = pd.DataFrame.from_records(rows, columns=kriteria)
+            for k in kriteria:
+                sketches[k].add(values[k].to_numpy(dtype=float))
+        return sketches
+
+    @staticmethod
+    def _save_sketches(conn, username, sketches):
+        conn.executemany(
+            "INSERT INTO sketsa_kuantil VALUES (?, ?, ?) "
+            "ON CONFLICT(username, kriteria) DO UPDATE SET data = excluded.data",
+            [(username, k, sketch.to_json()) for k, sketch in sketches.items()],
+        )
+
+    @staticmethod
+    def _fetch_criteria(conn, username, ids):
+        """Id dan nilai kriteria lama untuk baris yang akan dihapus."""
+        kriteria, ids = ["id", *likert_config], list(ids)
+        rows = []
+        for i in range(0, len(ids), 500):  # Batas jumlah parameter SQLite
+            chunk = ids[i : i + 500]
+            rows += conn.execute(
+                f"SELECT {', '.join(kriteria)} FROM laptops "
+                f"WHERE username=? AND id IN ({', '.join('?' * len(chunk))})",
+                [username, *chunk],
+            ).fetchall()
+        return pd.DataFrame.from_records(rows, columns=kriteria)
+
+    def get_sketches(self, username):
+        with self.connection() as conn:
+            rows = conn.execute(
+                "SELECT kriteria, data FROM sketsa_kuantil WHERE username=?",
+                (username,),
+            ).fetchall()
+        sketches = {k: QuantileSketch.from_json(data) for k, data in rows}
+        if set(sketches) == set(likert_config):
+            return sketches
+
+        def backfill(conn):
+            sketches = self._load_sketches(conn, username)
+            self._save_sketches(conn, username, sketches)
+            return sketches
+
+        return self.run_in_transaction(backfill)
+
+    def get_likert_otomatis(self, username):
+        with self.connection() as conn:
+            row = conn.execute(
+                "SELECT likert_otomatis FROM pengaturan_pengguna WHERE username=?",
+                (username,),
+            ).fetchone()
+        return bool(row and row[0])
+
+    def set_likert_otomatis(self, username, otomatis):
+        def write(conn):
+            conn.execute(
+                "INSERT INTO pengaturan_pengguna VALUES (?, ?) "
+                "ON CONFLICT(username) DO UPDATE SET likert_otomatis = excluded.likert_otomatis",
+                (username, int(otomatis)),
+            )
+
+        self.run_in_transaction(write)
+
+    def get_likert_config(self, username):
+        """likert_config yang berlaku: bawaan, atau dari kuantil katalog jika mode otomatis."""
+        if not self.get_likert_otomatis(username):
+            return likert_config
+        return derive_likert_config(self.get_sketches(username), likert_config)
+
+    # --- Laptop ---
+    @staticmethod
+    def _laptop_values(data):
+        values = (
+            data["nama"],
+            data["harga"],
+            data["ram"],
+            data["storage"],
+            data["prosesor"],
+            get_skor(data["prosesor"], prosesor_scores),
+            data["gpu"],
+            get_skor(data["gpu"], gpu_scores),
+            data["layar"],
+            data["rating"],
+        )
+        # Baris dari DataFrame berisi skalar NumPy; int64 akan disimpan SQLite sebagai BLOB
+        return tuple(v.item() if hasattr(v, "item") else v for v in values)
+
+    @staticmethod
+    def _laptop_rows(df):
+        """Baris siap-INSERT (kolom LAPTOP_COLUMNS) dari DataFrame input laptop."""
+        # Skor prosesor/GPU dicocokkan sekali per nama unik, bukan per baris
+        skor = {
+            "prosesor_skor": ("prosesor", prosesor_scores),
+            "gpu_skor": ("gpu", gpu_scores),
+        }
+        return pd.DataFrame(
+            {
+                col: (
+                    df[skor[col][0]].map(
+                        {v: get_skor(v, skor[col][1]) for v in df[skor[col][0]].unique()}
+                    )
+                    if col in skor
+                    else df[col]
+                )
+                for col in LAPTOP_COLUMNS
+            }
+        )
+
+    def unit_of_work(self, username):
+        """Mengelompokkan beberapa operasi tulis pengguna menjadi satu transaksi.
+
+        Contoh:
+            with storage.unit_of_work(username) as uow:
+                uow.update_laptop(1, data)
+                uow.delete_laptops([2, 3])
+        """
+        return UnitOfWork(self, username)
+
+    def insert_laptop(self, username, data):
+        with self.unit_of_work(username) as uow:
+            uow.insert_laptop(data)
+
+    def insert_laptops(self, username, df):
+        """Menyisipkan banyak laptop (DataFrame tervalidasi) dalam satu transaksi."""
+        with self.unit_of_work(username) as uow:
+            return uow.insert_laptops(df)
+
+    def update_laptop_data(self, username, id_to_update, data):
+        with self.unit_of_work(username) as uow:
+            uow.update_laptop(id_to_update, data)
+
+    def delete_laptops(self, username, ids_to_delete):
+        with self.unit_of_work(username) as uow:
+            uow.delete_laptops(ids_to_delete)
+
+    def delete_all_user_data(self, username):
+        with self.unit_of_work(username) as uow:
+            uow.delete_all()
+
+    def count_user_laptops(self, username, batasan=None):
+        clause, params = build_batasan_clause(batasan)
+        with self.connection() as conn:
+            return conn.execute(
+                "SELECT COUNT(*) FROM laptops WHERE username=?" + clause,
+                [username, *params],
+            ).fetchone()[0]
+
+    def get_user_laptops(self, username, batasan=None):
+        """Data laptop pengguna; dari snapshot kolumnar jika masih sesuai versi.
+
+        Jika ada batasan, hanya baris yang lolos yang dibaca langsung dari
+        database melalui indeks.
+        """
+        clause, params = build_batasan_clause(batasan)
+        if clause or not self.snapshot_dir:
+            with self.connection() as conn:
+                return pd.read_sql(
+                    "SELECT * FROM laptops WHERE username=?" + clause,
+                    conn,
+                    params=[username, *params],
+                )
+        versi = self.get_catalog_version(username)
+        df = snapshot.load(self.snapshot_dir, username, versi)
+        if df is None:
+            with self.connection() as conn:
+                df = pd.read_sql(
+                    "SELECT * FROM laptops WHERE username=?", conn, params=(username,)
+                )
+            snapshot.save(self.snapshot_dir, username, versi, df)
+        return df
+
+    def get_laptops_by_ids(self, username, ids, batasan=None):
+        """Baris laptop pengguna untuk daftar id tertentu (urutan tidak dijamin).
+
+        Dengan batasan, id yang tidak lolos batasan tidak ikut dikembalikan.
+        """
+        ids, frames = [int(i) for i in ids], []
+        clause, params = build_batasan_clause(batasan)
+        with self.connection() as conn:
+            for i in range(0, max(len(ids), 1), 500):  # Batas jumlah parameter SQLite
+                chunk = ids[i : i + 500]
+                frames.append(
+                    pd.read_sql(
+                        "SELECT * FROM laptops WHERE username=? AND id IN "
+                        f"({', '.join('?' * len(chunk))})" + clause,
+                        conn,
+                        params=[username, *chunk, *params],
+                    )
+                )
+        return pd.concat(frames, ignore_index=True)
+
+    def get_extrema(self, username, kriteria, batasan=None):
+        """(min, max) tiap kriteria, dihitung oleh database tanpa memuat baris."""
+        clause, params = build_batasan_clause(batasan)
+        for k in kriteria:
+            if k not in likert_config:  # Nama kolom hanya dari daftar kriteria
+                raise ValueError(f"Kriteria tidak dikenal: {k}")
+        # Satu query per kriteria agar masing-masing dilayani indeks (username, k)
+        extrema = {}
+        with self.connection() as conn:
+            for k in kriteria:
+                min_val, max_val = conn.execute(
+                    f"SELECT MIN({k}), MAX({k}) FROM laptops WHERE username=?"
+                    + clause,
+                    [username, *params],
+                ).fetchone()
+                extrema[k] = (
+                    float("nan") if min_val is None else min_val,
+                    float("nan") if max_val is None else max_val,
+                )
+        return extrema
+
+    def iter_user_laptops(self, username, columns, batasan=None, chunk_size=50_000):
+        """Mengalirkan data laptop pengguna per chunk DataFrame (memori terbatas)."""
+        allowed = {"id", "nama", "prosesor", "gpu", *likert_config.keys()}
+        if not set(columns) <= allowed:
+            raise ValueError(f"Kolom tidak dikenal: {set(columns) - allowed}")
+        clause, params = build_batasan_clause(batasan)
+        with self.connection() as conn:
+            cursor = conn.execute(
+                f"SELECT {', '.join(columns)} FROM laptops WHERE username=?" + clause,
+                [username, *params],
+            )
+            while True:
+                rows = cursor.fetchmany(chunk_size)
+                if not rows:
+                    break
+                yield pd.DataFrame.from_records(rows, columns=columns)
+
+    @staticmethod
+    def build_fts_query(query):
+        """Mengubah input bebas menjadi query FTS5 (setiap kata dicocokkan sebagai prefiks)."""
+        tokens = re.findall(r"\w+", str(query).lower())
+        return " ".join(f'"{t}"*' for t in tokens)
+
+    def search_laptops(self, username, query, limit=SEARCH_LIMIT):
+        """Pencarian full-text; None jika query kosong.
+
+        limit=None mengembalikan semua yang cocok (mis. untuk menyaring hasil
+        peringkat), selain itu hanya `limit` hasil paling relevan.
+        """
+        fts_query = self.build_fts_query(query)
+        if not fts_query:
+            return None
+        sql = """
+            SELECT l.* FROM laptops_fts
+            JOIN laptops l ON l.id = laptops_fts.rowid
+            WHERE laptops_fts MATCH ? AND l.username = ?
+            ORDER BY laptops_fts.rank"""
+        params = (fts_query, username)
+        if limit is not None:
+            sql += " LIMIT ?"
+            params += (limit,)
+        with self.connection() as conn:
+            return pd.read_sql(sql, conn, params=params)
+
+    # --- Bobot ---
+    def update_bobot(self, username, bobot_dict):
+        with self.unit_of_work(username) as uow:
+            uow.set_bobot(bobot_dict)
+
+    def get_bobot(self, username):
+        """Bobot & tipe kriteria pengguna; bobot default jika belum pernah disimpan."""
+        with self.connection() as conn:
+            rows = conn.execute(
+                "SELECT kriteria, bobot, tipe FROM bobot_kriteria WHERE username=?",
+                (username,),
+            ).fetchall()
+        if not rows:
+            return dict(default_bobot), {k: get_tipe(k) for k in default_bobot}
+        return {k: b for k, b, _ in rows}, {k: t for k, _, t in rows}
+
+    # --- Batasan (Filter Wajib) ---
+    def update_batasan(self, username, batasan_dict):
+        with self.unit_of_work(username) as uow:
+            uow.set_batasan(batasan_dict)
+
+    def get_batasan(self, username):
+        with self.connection() as conn:
+            rows = conn.execute(
+                "SELECT kriteria, min_val, max_val FROM batasan_kriteria WHERE username=?",
+                (username,),
+            ).fetchall()
+        return {k: (min_val, max_val) for k, min_val, max_val in rows}
+
+    # --- Cache Hasil Ranking (persisten, lihat ranking_cache.py) ---
+    def get_cached_ranking(self, cache_key):
+        with self.connection() as conn:
+            row = conn.execute(
+                "SELECT payload FROM cache_peringkat WHERE cache_key=?", (cache_key,)
+            ).fetchone()
+        return row[0] if row else None
+
+    @staticmethod
+    def _write_cached_ranking(conn, cache_key, username, payload):
+        # Hanya hasil terbaru per pengguna yang disimpan; versi lama pasti basi
+        conn.execute(
+            "DELETE FROM cache_peringkat WHERE username=? AND cache_key<>?",
+            (username, cache_key),
+        )
+        conn.execute(
+            "INSERT INTO cache_peringkat VALUES (?, ?, ?, ?) "
+            "ON CONFLICT(cache_key) DO UPDATE SET "
+            "payload=excluded.payload, dibuat_pada=excluded.dibuat_pada",
+            (cache_key, username, payload, time.time()),
+        )
+
+    def save_cached_ranking(self, cache_key, username, payload):
+        self.run_in_transaction(
+            self._write_cached_ranking, cache_key, username, payload
+        )
+
+    # --- Hasil Rekomendasi (batch_refresh.py) ---
+    def save_recommendations(self, usernames, rows, cached):
+        """Mengganti hasil sekelompok pengguna dalam satu transaksi singkat.
+
+        rows berisi (username, laptop_id, nama, skor_maut, rank_maut, skor_wp,
+        rank_wp); cached berisi (cache_key, username, payload) untuk cache_peringkat,
+        sehingga halaman hasil & API langsung mendapat cache hit.
+        """
+        now = time.time()
+
+        def write(conn):
+            conn.executemany(
+                "DELETE FROM hasil_rekomendasi WHERE username=?",
+                [(u,) for u in usernames],
+            )
+            conn.executemany(
+                "INSERT INTO hasil_rekomendasi VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+                [(*row, now) for row in rows],
+            )
+            for cache_key, username, payload in cached:
+                self._write_cached_ranking(conn, cache_key, username, payload)
+
+        self.run_in_transaction(write)
+
+    def prune_recommendations(self, active_usernames):
+        """Menghapus hasil & cache milik pengguna yang tidak lagi punya laptop."""
+        active = set(active_usernames)
+
+        def write(conn):
+            stale = [
+                (u,)
+                for (u,) in conn.execute(
+                    "SELECT username FROM hasil_rekomendasi UNION "
+                    "SELECT username FROM cache_peringkat"
+                )
+                if u not in active
+            ]
+            conn.executemany("DELETE FROM hasil_rekomendasi WHERE username=?", stale)
+            conn.executemany("DELETE FROM cache_peringkat WHERE username=?", stale)
+            return len(stale)
+
+        return self.run_in_transaction(write)
+
+    # --- Jurnal Perubahan ---
+    def _read_journal(self, username, where, params, expand):
+        with self.connection() as conn:
+            rows = conn.execute(
+                "SELECT seq, versi, tabel, aksi, row_ids, kolom FROM jurnal_perubahan "
+                f"WHERE username=?{where} ORDER BY seq",
+                (username, *params),
+            ).fetchall()
+        entries = []
+        for seq, versi, tabel, aksi, row_ids, kolom in rows:
+            entry = {
+                "seq": seq,
+                "versi": versi,
+                "tabel": tabel,
+                "aksi": aksi,
+                "row_ids": row_ids,
+                "kolom": kolom.split(",") if kolom else [],
+            }
+            if expand:
+                entry["ids"] = expand_ids(row_ids)
+            entries.append(entry)
+        return entries
+
+    def get_changes(self, username, since_seq=0):
+        """Entri jurnal pengguna setelah nomor urut since_seq (terlama lebih dulu)."""
+        return self._read_journal(username, " AND seq>?", (since_seq,), expand=True)
+
+    def get_catalog_changes(self, username, since_versi):
+        """Perubahan tabel laptops setelah versi katalog since_versi.
+
+        Id baris dikembalikan dalam bentuk ringkas (row_ids, lihat expand_ids).
+        None jika jurnal tidak mencakup semua versi tersebut (mis. data lama
+        sebelum jurnal ada, atau entri sudah dipangkas): pembaca harus memuat ulang.
+        """
+        if self.get_catalog_version(username) <= since_versi:
+            return []
+        changes = self._read_journal(
+            username,
+            " AND tabel='laptops' AND versi>?",
+            (since_versi,),
+            expand=False,
+        )
+        # Setiap commit yang mengubah katalog menaikkan versi tepat satu kali dan
+        # menulis entrinya, jadi cukup memastikan versi since_versi + 1 tercatat.
+        if not changes or changes[0]["versi"] != since_versi + 1:
+            return None
+        return changes
+
+    # --- Utilitas untuk proses batch ---
+    def get_user_counts(self):
+        """Daftar (username, jumlah laptop) untuk semua pengguna."""
+        with self.connection() as conn:
+            return conn.execute(
+                "SELECT username, COUNT(*) FROM laptops "
+                "WHERE username IS NOT NULL GROUP BY username"
+            ).fetchall()
+
+    def close(self):
+        self.pool.close()
+
+
+# ---------- Unit of Work & Jurnal Perubahan ----------
+def compact_ids(ids):
+    """[1, 2, 3, 7, 9, 10] -> "1-3,7,9-10" (id hasil impor biasanya berurutan)."""
+    parts, ids = [], sorted(ids)
+    i = 0
+    while i < len(ids):
+        j = i
+        while j + 1 < len(ids) and ids[j + 1] == ids[j] + 1:
+            j += 1
+        parts.append(str(ids[i]) if i == j else f"{ids[i]}-{ids[j]}")
+        i = j + 1
+    return ",".join(parts)
+
+
+def expand_ids(text):
+    ids = []
+    for part in filter(None, (text or "").split(",")):
+        start, _, end = part.partition("-")
+        ids.extend(range(int(start), int(end or start) + 1))
+    return ids
+
+
+def _same(a, b):
+    """Perbandingan nilai lama (SQLite) dan baru; None dan NaN dianggap sama."""
+    if pd.isna(a) or pd.isna(b):
+        return pd.isna(a) and pd.isna(b)
+    return a == b
+
+
+class UnitOfWork:
+    """Operasi tulis satu pengguna yang di-commit bersama dalam satu transaksi.
+
+    Method hanya mencatat operasi; eksekusi terjadi saat keluar dari blok with
+    (tidak ada yang ditulis jika blok melempar exception), sehingga seluruh unit
+    dapat diulang utuh oleh run_in_transaction saat database sibuk. Satu commit
+    menaikkan versi katalog paling banyak sekali dan menambahkan entri ringkas
+    ke jurnal_perubahan (tabel, aksi, id baris, kolom yang berubah, versi).
+    """
+
+    def __init__(self, storage, username):
+        self.storage = storage
+        self.username = username
+        self._ops = []
+        self.journal = []  # Entri jurnal dari commit terakhir
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        if exc_type is None:
+            self.commit()
+
+    # --- Pencatatan operasi ---
+    def insert_laptops(self, df):
+        rows = self.storage._laptop_rows(df)
+        if len(rows):
+            self._ops.append(("insert", rows))
+        return len(rows)
+
+    def insert_laptop(self, data):
+        values = self.storage._laptop_values(data)
+        self._ops.append(("insert", pd.DataFrame([values], columns=LAPTOP_COLUMNS)))
+
+    def update_laptop(self, laptop_id, data):
+        values = dict(zip(LAPTOP_COLUMNS, self.storage._laptop_values(data)))
+        self._ops.append(("update", int(laptop_id), values))
+
+    def delete_laptops(self, ids):
+        self._ops.append(("delete", [int(i) for i in ids]))
+
+    def delete_all(self):
+        self._ops.append(("delete_all",))
+
+    def set_bobot(self, bobot_dict):
+        self._ops.append(("bobot", dict(bobot_dict)))
+
+    def set_batasan(self, batasan_dict):
+        self._ops.append(("batasan", dict(batasan_dict)))
+
+    # --- Eksekusi ---
+    def commit(self):
+        """Menjalankan semua operasi; mengembalikan entri jurnal yang ditulis."""
+        if self._ops:
+            self.storage.run_in_transaction(self._apply)
+            self._ops = []
+        return self.journal
+
+    def _sketches(self, conn):
+        # Dimuat sebelum perubahan pertama: pengisian awal membaca isi tabel saat ini
+        if self._loaded_sketches is None:
+            self._loaded_sketches = self.storage._load_sketches(conn, self.username)
+        return self._loaded_sketches
+
+    def _apply(self, conn):
+        self.journal, self._loaded_sketches = [], None  # Diulang dari awal saat retry
+        for op, *args in self._ops:
+            entry = getattr(self, f"_apply_{op}")(conn, *args)
+            if entry:
+                self.journal.append(entry)
+
+        if self._loaded_sketches is not None:
+            self.storage._save_sketches(conn, self.username, self._loaded_sketches)
+        if any(e["tabel"] == "laptops" for e in self.journal):
+            self.storage._bump_catalog_version(conn, self.username)
+        row = conn.execute(
+            "SELECT versi FROM versi_katalog WHERE username=?", (self.username,)
+        ).fetchone()
+        versi = row[0] if row else 0
+        now = time.time()
+        conn.executemany(
+            "INSERT INTO jurnal_perubahan (username, versi, tabel, aksi, row_ids, kolom, dibuat_pada) "
+            "VALUES (?, ?, ?, ?, ?, ?, ?)",
+            [
+                (
+                    self.username,
+                    versi,
+                    e["tabel"],
+                    e["aksi"],
+                    compact_ids(e["ids"]),
+                    ",".join(e["kolom"]),
+                    now,
+                )
+                for e in self.journal
+            ],
+        )
+        for e in self.journal:
+            e["versi"] = versi
+        if self.journal:
+            # Jurnal dijaga tetap ringkas: hanya JOURNAL_KEEP entri terakhir per pengguna
+            conn.execute(
+                "DELETE FROM jurnal_perubahan WHERE username=? AND seq <= ("
+                "SELECT seq FROM jurnal_perubahan WHERE username=? "
+                "ORDER BY seq DESC LIMIT 1 OFFSET ?)",
+                (self.username, self.username, JOURNAL_KEEP),
+            )
+
+    def _apply_insert(self, conn, rows):
+        max_id = conn.execute("SELECT COALESCE(MAX(id), 0) FROM laptops").fetchone()[0]
+        for k, sketch in self._sketches(conn).items():
+            sketch.add(rows[k].to_numpy(dtype=float))
+        conn.executemany(
+            f"INSERT INTO laptops (username, {', '.join(LAPTOP_COLUMNS)}) "
+            f"VALUES (?, {', '.join('?' * len(LAPTOP_COLUMNS))})",
+            # to_dict mengembalikan skalar Python (int64 NumPy akan disimpan sebagai BLOB)
+            [(self.username, *r) for r in rows.to_dict("split", index=False)["data"]],
+        )
+        # Transaksi tulis bersifat eksklusif, jadi id baru pasti milik INSERT ini
+        ids = [
+            r[0]
+            for r in conn.execute(
+                "SELECT id FROM laptops WHERE id>? AND username=?",
+                (max_id, self.username),
+            )
+        ]
+        return {"tabel": "laptops", "aksi": "insert", "ids": ids, "kolom": LAPTOP_COLUMNS}
+
+    def _apply_update(self, conn, laptop_id, values):
+        row = conn.execute(
+            f"SELECT {', '.join(LAPTOP_COLUMNS)} FROM laptops WHERE id=? AND username=?",
+            (laptop_id, self.username),
+        ).fetchone()
+        if row is None:
+            return None
+        old = dict(zip(LAPTOP_COLUMNS, row))
+        changed = [c for c in LAPTOP_COLUMNS if not _same(old[c], values[c])]
+        if not changed:
+            return None
+        for k in changed:
+            if k in likert_config:
+                sketch = self._sketches(conn)[k]
+                sketch.remove([old[k] if old[k] is not None else float("nan")])
+                sketch.add([values[k] if values[k] is not None else float("nan")])
+        conn.execute(
+            f"UPDATE laptops SET {', '.join(f'{c}=?' for c in changed)} "
+            "WHERE id=? AND username=?",
+            (*(values[c] for c in changed), laptop_id, self.username),
+        )
+        return {"tabel": "laptops", "aksi": "update", "ids": [laptop_id], "kolom": changed}
+
+    def _apply_delete(self, conn, ids):
+        removed = self.storage._fetch_criteria(conn, self.username, ids)
+        if removed.empty:
+            return None
+        for k, sketch in self._sketches(conn).items():
+            sketch.remove(removed[k].to_numpy(dtype=float))
+        conn.executemany(
+            "DELETE FROM laptops WHERE id=? AND username=?",
+            [(i, self.username) for i in removed["id"]],
+        )
+        return {
+            "tabel": "laptops",
+            "aksi": "delete",
+            "ids": removed["id"].tolist(),
+            "kolom": [],
+        }
+
+    def _apply_delete_all(self, conn):
+        ids = [
+            r[0]
+            for r in conn.execute(
+                "SELECT id FROM laptops WHERE username=?", (self.username,)
+            )
+        ]
+        if not ids:
+            return None
+        conn.execute("DELETE FROM laptops WHERE username=?", (self.username,))
+        self._loaded_sketches = {k: QuantileSketch() for k in likert_config}
+        return {"tabel": "laptops", "aksi": "delete", "ids": ids, "kolom": []}
+
+    def _apply_bobot(self, conn, bobot_dict):
+        old = {
+            k: (b, t)
+            for k, b, t in conn.execute(
+                "SELECT kriteria, bobot, tipe FROM bobot_kriteria WHERE username=?",
+                (self.username,),
+            )
+        }
+        new = {k: (v, get_tipe(k)) for k, v in bobot_dict.items()}
+        return self._upsert_kriteria(
+            conn,
+            "bobot_kriteria",
+            "bobot=excluded.bobot, tipe=excluded.tipe",
+            old,
+            new,
+        )
+
+    def _apply_batasan(self, conn, batasan_dict):
+        old = {
+            k: (min_val, max_val)
+            for k, min_val, max_val in conn.execute(
+                "SELECT kriteria, min_val, max_val FROM batasan_kriteria WHERE username=?",
+                (self.username,),
+            )
+        }
+        new = {
+            k: (min_val, max_val)
+            for k, (min_val, max_val) in batasan_dict.items()
+            if min_val is not None or max_val is not None
+        }
+        return self._upsert_kriteria(
+            conn,
+            "batasan_kriteria",
+            "min_val=excluded.min_val, max_val=excluded.max_val",
+            old,
+            new,
+        )
+
+    def _upsert_kriteria(self, conn, tabel, set_clause, old, new):
+        """Upsert baris (username, kriteria) yang berubah; hapus yang tidak ada lagi."""
+        changed = [k for k, v in new.items() if old.get(k) != v]
+        removed = [k for k in old if k not in new]
+        conn.executemany(
+            f"INSERT INTO {tabel} VALUES (?, ?, ?, ?) "
+            f"ON CONFLICT(username, kriteria) DO UPDATE SET {set_clause}",
+            [(self.username, k, *new[k]) for k in changed],
+        )
+        conn.executemany(
+            f"DELETE FROM {tabel} WHERE username=? AND kriteria=?",
+            [(self.username, k) for k in removed],
+        )
+        if not changed and not removed:
+            return None
+        return {"tabel": tabel, "aksi": "upsert", "ids": [], "kolom": changed + removed}
@@ -0,0 +1,44 @@
+# conftest.py - Fixture bersama: storage SQLite sementara dan data laptop sintetis
+
+import os
+import random
+import sys
+
+import pandas as pd
+import pytest
+
+# Modul aplikasi berada di root repositori (tata letak datar)
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from storage import SQLiteBackend, Storage  # noqa: E402
+
+PROSESOR = ["Intel Core i5-1235U", "AMD Ryzen 7 7840HS", "Apple M2", "Intel Core i3"]
+GPU = ["Intel Iris Xe", "NVIDIA RTX 4060", "AMD Radeon Graphics", "NVIDIA GTX 1650"]
+
+
+def make_laptops(n, seed=0):
+    """DataFrame laptop sintetis dengan kolom input seperti hasil validate_upload."""
+    rng = random.Random(seed)
+    return pd.DataFrame(
+        [
+            {
+                "nama": f"Laptop {i}",
+                "harga": float(rng.randrange(5_000_000, 40_000_000, 100_000)),
+                "ram": float(rng.choice([4, 8, 16, 32])),
+                "storage": float(rng.choice([256, 512, 1024])),
+                "prosesor": rng.choice(PROSESOR),
+                "gpu": rng.choice(GPU),
+                "layar": rng.choice([13.3, 14.0, 15.6]),
+                "rating": round(rng.uniform(3, 5), 1),
+            }
+            for i in range(n)
+        ]
+    )
+
+
+@pytest.fixture
+def storage(tmp_path):
+    s = Storage(SQLiteBackend(str(tmp_path / "test.db")), retry_delay=0)
+    s.setup_schema()
+    yield s
+    s.close()
@@ -0,0 +1,86 @@
+import asyncio
+import time
+
+import pytest
+
+from api import ApiError, RankingAPI
+from conftest import make_laptops
+
+USER = "budi"
+N_REQUESTS = 20
+
+
+@pytest.fixture
+def api(storage, tmp_path):
+    storage.insert_laptops(USER, make_laptops(200))
+    api = RankingAPI(str(tmp_path / "test.db"), workers=4)
+    yield api
+    api.executor.shutdown()
+    api.storage.close()
+
+
+def slow_compute(api, monkeypatch, fail=False):
+    """Memperlambat perhitungan agar semua permintaan tiba saat masih berjalan."""
+    original = api._compute_ranking
+
+    def compute(*args):
+        time.sleep(0.3)
+        if fail:
+            raise RuntimeError("gagal")
+        return original(*args)
+
+    monkeypatch.setattr(api, "_compute_ranking", compute)
+
+
+def test_concurrent_rankings_are_coalesced(api, monkeypatch):
+    slow_compute(api, monkeypatch)
+
+    async def main():
+        return await asyncio.gather(
+            *[
+                api.dispatch("GET", f"/users/{USER}/ranking?k=5", None)
+                for _ in range(N_REQUESTS)
+            ]
+        )
+
+    responses = asyncio.run(main())
+    assert api.computed == 1 and api.coalesced == N_REQUESTS - 1
+    assert all(r == responses[0] for r in responses)
+    status, body = responses[0]
+    assert status == 200 and len(body["hasil"]) == 5
+    ranks = [h["rank"] for h in body["hasil"]]
+    assert ranks == sorted(ranks)
+
+    # Berikutnya dilayani cache, bukan dihitung ulang dari katalog
+    asyncio.run(api.dispatch("GET", f"/users/{USER}/ranking", None))
+    assert api.cache.stats()["hits"] >= 1
+
+
+def test_failure_reaches_every_waiter(api, monkeypatch):
+    slow_compute(api, monkeypatch, fail=True)
+
+    async def main():
+        return await asyncio.gather(
+            *[api.dispatch("GET", f"/users/{USER}/ranking", None) for _ in range(5)],
+            return_exceptions=True,
+        )
+
+    hasil = asyncio.run(main())
+    assert all(isinstance(h, RuntimeError) for h in hasil)
+    assert api._inflight == {}
+
+
+@pytest.mark.parametrize(
+    "method, target, body, status",
+    [
+        ("GET", "/tidak-ada", None, 404),
+        ("POST", f"/users/{USER}/ranking", None, 405),
+        ("GET", f"/users/{USER}/ranking?k=0", None, 400),
+        ("PUT", f"/users/{USER}/bobot", {"harga": True}, 400),
+        ("DELETE", f"/users/{USER}/laptops", {"ids": [True]}, 400),
+    ],
+)
+def test_invalid_requests(api, method, target, body, status):
+    with pytest.raises(ApiError) as err:
+        asyncio.run(api.dispatch(method, target, body))
+    assert err.value.status == status
@@ -0,0 +1,57 @@
+import numpy as np
+import pytest
+
+from conftest import make_laptops
+from spk import build_batasan_clause
+
+USER = "budi"
+
+
+def filter_pandas(df, batasan):
+    mask = np.ones(len(df), dtype=bool)
+    for k, (min_val, max_val) in batasan.items():
+        if min_val is not None:
+            mask &= df[k] >= min_val
+        if max_val is not None:
+            mask &= df[k] <= max_val
+    return df[mask]
+
+
+def test_clause_skips_unknown_columns_and_open_bounds():
+    clause, params = build_batasan_clause(
+        {"harga": (None, 10_000_000), "ram": (8, None), "nama; DROP": (1, 2)}
+    )
+    assert clause == " AND harga <= ? AND ram >= ?"
+    assert params == [10_000_000, 8]
+    assert build_batasan_clause(None) == ("", [])
+
+
+@pytest.mark.parametrize(
+    "batasan",
+    [
+        {},
+        {"harga": (None, 15_000_000)},
+        {"ram": (16, None), "storage": (512, 1024)},
+        {"harga": (10_000_000, 20_000_000), "layar": (14, 14), "rating": (4, None)},
+        {"harga": (50_000_000, None)},
+    ],
+)
+def test_sql_filter_matches_pandas(storage, batasan):
+    df = make_laptops(200)
+    df.loc[::9, "ram"] = np.nan  # Nilai kosong tidak lolos batasan apa pun
+    storage.insert_laptops(USER, df)
+    storage.insert_laptops("ani", make_laptops(50, seed=1))
+    semua = storage.get_user_laptops(USER)
+
+    hasil = storage.get_user_laptops(USER, batasan)
+    want = filter_pandas(semua, batasan)
+    assert sorted(hasil["id"]) == sorted(want["id"])
+    assert storage.count_user_laptops(USER, batasan) == len(want)
+
+
+def test_saved_batasan_roundtrip(storage):
+    batasan = {"harga": (None, 12_000_000.0), "ram": (8.0, 32.0)}
+    storage.update_batasan(USER, batasan)
+    assert storage.get_batasan(USER) == batasan
+    storage.update_batasan(USER, {})
+    assert storage.get_batasan(USER) == {}
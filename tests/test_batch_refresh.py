@@ -0,0 +1,54 @@
+from batch_refresh import partition_users, refresh_all
+from conftest import make_laptops
+from ranking_cache import RankingCache, make_cache_key
+
+
+def test_partition_users_balances_rows():
+    counts = [("a", 100), ("b", 60), ("c", 50), ("d", 10)]
+    parts = partition_users(counts, 2)
+    assert sorted(u for p in parts for u in p) == ["a", "b", "c", "d"]
+    # Greedy: a -> 1, b -> 2, c -> 2 (60 < 100), d -> 1; total 110 / 110
+    assert parts == [["a", "d"], ["b", "c"]]
+
+
+def test_refresh_fills_results_and_ranking_cache(storage):
+    db_path = storage.backend.path
+    storage.insert_laptops("ani", make_laptops(30))
+    storage.insert_laptops("budi", make_laptops(40, seed=1))
+    storage.update_batasan("budi", {"ram": (8, None)})
+
+    lolos = storage.count_user_laptops("budi", storage.get_batasan("budi"))
+    assert refresh_all(db_path, workers=2) == (2, 30 + lolos)
+
+    # Kunci yang sama seperti get_ranking di web.py -> cache hit dari database
+    for username in ["ani", "budi"]:
+        bobot, tipe = storage.get_bobot(username)
+        key = make_cache_key(
+            username,
+            storage.get_catalog_version(username),
+            bobot,
+            tipe,
+            storage.get_likert_config(username),
+            storage.get_batasan(username),
+        )
+        hasil = RankingCache(storage=storage).get(key)
+        assert hasil is not None
+        with storage.connection() as conn:
+            rows = conn.execute(
+                "SELECT laptop_id, rank_wp FROM hasil_rekomendasi WHERE username=?",
+                (username,),
+            ).fetchall()
+        assert sorted(rows) == sorted(
+            hasil["results"][["id", "Rank WP"]].itertuples(index=False, name=None)
+        )
+
+
+def test_refresh_prunes_users_without_laptops(storage):
+    db_path = storage.backend.path
+    storage.insert_laptops("ani", make_laptops(10))
+    refresh_all(db_path, workers=1)
+    storage.delete_all_user_data("ani")
+    refresh_all(db_path, workers=1)
+    with storage.connection() as conn:
+        for tabel in ["hasil_rekomendasi", "cache_peringkat"]:
+            assert conn.execute(f"SELECT COUNT(*) FROM {tabel}").fetchone()[0] == 0
@@ -0,0 +1,161 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from conftest import make_laptops
+from kemiripan import KDTree, SimilarityIndex
+
+KRITERIA = ["harga", "ram", "storage"]
+
+
+def make_catalog(n, seed=0):
+    rng = np.random.default_rng(seed)
+    return pd.DataFrame(
+        {
+            "id": np.arange(1, n + 1),
+            "harga": rng.integers(50, 400, n) * 100_000.0,
+            "ram": rng.choice([4.0, 8.0, 16.0, 32.0], n),
+            "storage": rng.choice([256.0, 512.0, 1024.0], n),
+        }
+    )
+
+
+def brute_force(df, laptop_id, k, cheaper=False):
+    """Tetangga terdekat dengan normalisasi min-max atas seluruh katalog."""
+    raw = df[KRITERIA].to_numpy(dtype=float)
+    lo, hi = np.nanmin(raw, axis=0), np.nanmax(raw, axis=0)
+    points = np.nan_to_num((raw - lo) / np.where(hi > lo, hi - lo, 1.0))
+    points[:, hi == lo] = 1.0
+    pos = int(np.flatnonzero(df["id"].to_numpy() == laptop_id)[0])
+    dist = ((points - points[pos]) ** 2).sum(axis=1)
+    mask = df["id"].to_numpy() != laptop_id
+    if cheaper:
+        mask &= raw[:, 0] < raw[pos, 0]
+    idx = np.flatnonzero(mask)
+    idx = idx[np.lexsort((df["id"].to_numpy()[idx], dist[idx]))][:k]
+    return df["id"].to_numpy()[idx], np.sqrt(dist[idx])
+
+
+def assert_matches_brute_force(index, df, ids, k=5):
+    for laptop_id in ids:
+        for cheaper in (False, True):
+            got_ids, got_dist = index.query(laptop_id, k, cheaper)
+            want_ids, want_dist = brute_force(df, laptop_id, k, cheaper)
+            np.testing.assert_allclose(got_dist, want_dist)
+            # Jarak seri boleh muncul dalam urutan id yang berbeda
+            assert set(got_ids[got_dist < want_dist[-1]]) == set(
+                want_ids[want_dist < want_dist[-1]]
+            )
+
+
+def test_kdtree_matches_brute_force():
+    rng = np.random.default_rng(1)
+    points = rng.random((500, 3))
+    harga = rng.random(500)
+    tree = KDTree(points, harga, leaf_size=8)
+    alive = np.ones(500, dtype=bool)
+    alive[::7] = False
+    point = rng.random(3)
+    dist = ((points - point) ** 2).sum(axis=1)
+    mask = alive & (harga < 0.5)
+    want = np.sort(dist[mask])[:10]
+    got = tree.query(point, 10, alive, harga_max=0.5)
+    np.testing.assert_allclose([d for d, _ in got], want)
+
+
+def test_similarity_index_matches_brute_force_after_incremental_sync():
+    df = make_catalog(400)
+    index = SimilarityIndex(KRITERIA, leaf_size=8)
+    index.sync(1, lambda: df)
+    assert_matches_brute_force(index, df, [1, 50, 399])
+
+    # Perubahan kecil tanpa menggeser min/max: diterapkan tanpa bangun ulang
+    df2 = df.copy()
+    inner = (df2["harga"] > df2["harga"].min()) & (df2["harga"] < df2["harga"].max())
+    changed = df2.index[inner][:5]
+    df2.loc[changed, "harga"] = df2.loc[changed, "harga"] + 100_000
+    df2 = df2.drop(df2.index[inner][10:15])
+    new = make_catalog(3, seed=5).assign(id=[1001, 1002, 1003], harga=10_000_000.0)
+    df2 = pd.concat([df2, new], ignore_index=True)
+    index.sync(2, lambda: df2)
+    assert index.rebuilds == 1
+    assert_matches_brute_force(index, df2, [1001, int(df2["id"].iloc[changed[0]]), 7])
+
+    with pytest.raises(KeyError):
+        index.query(int(df.loc[df.index[inner][10], "id"]))
+
+
+def test_sync_skips_reload_for_non_criteria_changes():
+    df = make_catalog(50)
+    index = SimilarityIndex(KRITERIA)
+    index.sync(1, lambda: df)
+
+    def fail():
+        raise AssertionError("katalog tidak boleh dimuat ulang")
+
+    name_only = [{"aksi": "update", "kolom": ["nama"]}]
+    index.sync(2, fail, lambda since: name_only)
+    assert index.versi == 2
+
+    loads = []
+    harga_changed = [{"aksi": "update", "kolom": ["harga"]}]
+    index.sync(3, lambda: loads.append(1) or df, lambda since: harga_changed)
+    index.sync(4, lambda: loads.append(1) or df, lambda since: None)
+    assert len(loads) == 2
+
+
+def journal_sync(index, storage, username, batasan=None):
+    """sync() seperti di web.py; mengembalikan jumlah pemuatan katalog penuh."""
+    loads = []
+
+    def load_df():
+        loads.append(1)
+        return storage.get_user_laptops(username, batasan)
+
+    index.sync(
+        storage.get_catalog_version(username),
+        load_df,
+        lambda since: storage.get_catalog_changes(username, since),
+        lambda ids: storage.get_laptops_by_ids(username, ids, batasan),
+        lambda kriteria: storage.get_extrema(username, kriteria, batasan),
+    )
+    return len(loads)
+
+
+@pytest.mark.parametrize("batasan", [None, {"ram": (8, None)}])
+def test_sync_reads_only_changed_rows_from_journal(storage, batasan):
+    user = "budi"
+    storage.insert_laptops(user, make_laptops(300))
+    index = SimilarityIndex(KRITERIA, leaf_size=8)
+    assert journal_sync(index, storage, user, batasan) == 1
+
+    df = storage.get_user_laptops(user, batasan)
+    inner = df[
+        (df["harga"] > df["harga"].min()) & (df["harga"] < df["harga"].max())
+    ]["id"]
+    row = storage.get_laptops_by_ids(user, [inner.iloc[0]]).iloc[0].to_dict()
+    row.update(harga=row["harga"] + 100_000, ram=4.0)  # Keluar dari batasan ram
+    storage.update_laptop_data(user, row["id"], row)
+    storage.delete_laptops(user, inner.iloc[1:4].tolist())
+    baru = make_laptops(2, seed=9).assign(harga=20_000_000.0, ram=16.0)
+    storage.insert_laptops(user, baru)
+    row2 = storage.get_laptops_by_ids(user, [inner.iloc[5]]).iloc[0].to_dict()
+    row2["nama"] = "Hanya Nama"
+    storage.update_laptop_data(user, row2["id"], row2)
+
+    assert journal_sync(index, storage, user, batasan) == 0
+    assert index.rebuilds == 1
+    df2 = storage.get_user_laptops(user, batasan)
+    new_ids = df2["id"].iloc[-2:].tolist()
+    assert_matches_brute_force(index, df2, [*new_ids, int(inner.iloc[6])])
+    if batasan:
+        with pytest.raises(KeyError):
+            index.query(int(row["id"]))
+
+    # Harga baru di luar rentang menggeser skala: katalog dimuat ulang penuh
+    row2["harga"] = df2["harga"].max() + 1_000_000
+    storage.update_laptop_data(user, row2["id"], row2)
+    assert journal_sync(index, storage, user, batasan) == 1
+    assert index.rebuilds == 2
+    df3 = storage.get_user_laptops(user, batasan)
+    assert_matches_brute_force(index, df3, [int(df3["id"].iloc[0]), row2["id"]])
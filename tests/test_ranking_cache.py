@@ -0,0 +1,55 @@
+import pandas as pd
+
+from ranking_cache import RankingCache, estimate_size, make_cache_key
+
+
+def hasil(n):
+    return {"results": pd.DataFrame({"id": range(n), "skor": [0.5] * n})}
+
+
+def test_cache_key_ignores_dict_order_and_tracks_inputs():
+    bobot, tipe = {"harga": 0.5, "ram": 0.5}, {"harga": "cost", "ram": "benefit"}
+    config = {"ram": [4, 8]}
+    key = make_cache_key("budi", 3, bobot, tipe, config)
+    reordered = dict(reversed(list(bobot.items())))
+    assert make_cache_key("budi", 3, reordered, tipe, config) == key
+    assert make_cache_key("budi", 4, bobot, tipe, config) != key
+    assert make_cache_key("budi", 3, bobot, tipe, config, {"ram": (8, None)}) != key
+
+
+def test_evicts_least_recently_used_by_entry_count():
+    cache = RankingCache(max_entries=2)
+    cache.put("a", hasil(1))
+    cache.put("b", hasil(1))
+    assert cache.get("a") is not None  # "a" kini paling baru dipakai
+    cache.put("c", hasil(1))
+    assert cache.get("b") is None
+    assert cache.get("a") is not None and cache.get("c") is not None
+    assert cache.stats()["entries"] == 2
+
+
+def test_evicts_by_bytes_and_skips_oversized_values():
+    size = estimate_size(hasil(1000))
+    cache = RankingCache(max_bytes=int(size * 2.5))
+    for key in "abc":
+        cache.put(key, hasil(1000))
+    assert cache.get("a") is None
+    assert cache.stats()["bytes"] <= cache.max_bytes
+    assert cache.stats()["entries"] == 2
+
+    cache.put("besar", hasil(10_000))
+    assert cache.get("besar") is None
+    assert cache.stats()["entries"] == 2
+
+
+def test_persisted_entries_survive_a_new_cache(storage):
+    cache = RankingCache(storage=storage)
+    cache.put("budi|1|x|y", hasil(5))
+    cache._writer.shutdown(wait=True)
+    restored = RankingCache(storage=storage).get("budi|1|x|y")
+    pd.testing.assert_frame_equal(restored["results"], hasil(5)["results"])
+
+    small = RankingCache(storage=storage, max_persist_bytes=10)
+    small.put("budi|2|x|y", hasil(5))
+    small._writer.shutdown(wait=True)
+    assert RankingCache(storage=storage).get("budi|2|x|y") is None
@@ -0,0 +1,52 @@
+import numpy as np
+import pytest
+
+from conftest import make_laptops
+from ranking_stream import rank_out_of_core
+from spk import calculate_maut, calculate_wp, get_tipe, likert_config, rank_results
+
+USER = "budi"
+TIPE = {k: get_tipe(k) for k in likert_config}
+BOBOT = {
+    "harga": 0.35,
+    "ram": 0.25,
+    "prosesor_skor": 0.2,
+    "gpu_skor": 0.1,
+    "rating": 0.1,
+}
+
+
+@pytest.mark.parametrize(
+    "batasan", [None, {"harga": (None, 25_000_000), "ram": (8, None)}]
+)
+def test_out_of_core_top_k_matches_in_memory(storage, batasan):
+    df = make_laptops(500)
+    df.loc[::13, "ram"] = np.nan
+    storage.insert_laptops(USER, df)
+
+    semua = storage.get_user_laptops(USER, batasan)
+    results = rank_results(
+        semua, calculate_maut(semua, BOBOT, TIPE), calculate_wp(semua, BOBOT, TIPE)
+    ).set_index("id")
+    k = 15
+    # Chunk kecil memaksa banyak penggabungan buffer Top-K
+    hasil, total = rank_out_of_core(
+        storage, USER, BOBOT, TIPE, batasan, k=k, chunk_size=37
+    )
+    assert total == len(semua)
+
+    for metode in ("MAUT", "WP"):
+        top = hasil[metode]
+        assert len(top) == k
+        want = results.loc[top["id"]]
+        np.testing.assert_allclose(top[f"Skor {metode}"], want[f"Skor {metode}"])
+        assert top[f"Rank {metode}"].tolist() == want[f"Rank {metode}"].tolist()
+        # Peringkat yang terpilih adalah K peringkat terbaik di seluruh katalog
+        terbaik = np.sort(results[f"Rank {metode}"].to_numpy())[:k]
+        assert top[f"Rank {metode}"].tolist() == terbaik.tolist()
+
+
+def test_out_of_core_empty_catalog(storage):
+    hasil, total = rank_out_of_core(storage, USER, BOBOT, TIPE, k=5)
+    assert total == 0
+    assert hasil["MAUT"].empty and hasil["WP"].empty
@@ -0,0 +1,45 @@
+import pytest
+
+from conftest import make_laptops
+from storage import SEARCH_LIMIT
+
+USER = "budi"
+
+
+def search_ids(storage, query, username=USER, limit=None):
+    return set(storage.search_laptops(username, query, limit)["id"])
+
+
+def test_empty_query_returns_none(storage):
+    assert storage.search_laptops(USER, "  ,. ") is None
+
+
+def test_fts_follows_insert_update_delete(storage):
+    storage.insert_laptops(USER, make_laptops(40))
+    storage.insert_laptops("ani", make_laptops(10))
+    df = storage.get_user_laptops(USER)
+    apple = set(df.loc[df["prosesor"] == "Apple M2", "id"])
+    assert search_ids(storage, "apple") == apple
+    # Pencocokan prefiks, tidak peka huruf besar/kecil
+    assert search_ids(storage, "APP") == apple
+
+    row = df.iloc[0].to_dict()
+    nama_lama = row["nama"]
+    row.update(nama="Zenbook Ultra", prosesor="Apple M2")
+    storage.update_laptop_data(USER, row["id"], row)
+    assert search_ids(storage, "zenbook") == {row["id"]}
+    assert row["id"] in search_ids(storage, "apple")
+    assert search_ids(storage, nama_lama) == set()
+
+    storage.delete_laptops(USER, [row["id"]])
+    assert search_ids(storage, "zenbook") == set()
+
+    storage.delete_all_user_data(USER)
+    assert search_ids(storage, "laptop") == set()
+    assert len(search_ids(storage, "laptop", username="ani")) == 10
+
+
+@pytest.mark.parametrize("limit, expected", [(None, 620), (SEARCH_LIMIT, 500)])
+def test_search_limit(storage, limit, expected):
+    storage.insert_laptops(USER, make_laptops(620))
+    assert len(search_ids(storage, "laptop", limit=limit)) == expected
@@ -0,0 +1,48 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from conftest import make_laptops
+from sensitivitas import analyze_sensitivity, perturb_weights, rank_rows
+from spk import build_score_matrices, get_tipe, likert_config
+
+USER = "budi"
+BOBOT = {"harga": 0.4, "ram": 0.3, "prosesor_skor": 0.2, "rating": 0.1}
+
+
+@pytest.fixture
+def matrices(storage):
+    storage.insert_laptops(USER, make_laptops(120))
+    df = storage.get_user_laptops(USER)
+    return build_score_matrices(df, {k: get_tipe(k) for k in likert_config})
+
+
+def test_rank_rows_matches_pandas_min_rank():
+    rng = np.random.default_rng(0)
+    scores = rng.integers(0, 5, size=(20, 30)) / 3  # Banyak skor seri
+    want = pd.DataFrame(scores).rank(axis=1, ascending=False, method="min")
+    np.testing.assert_array_equal(rank_rows(scores), want.to_numpy(dtype=int))
+
+
+def test_rank_rows_ignores_float_noise():
+    ranks = rank_rows(np.array([[0.1 + 0.2, 0.3, 0.1]]))
+    assert ranks.tolist() == [[1, 1, 3]]
+
+
+def test_perturb_weights_keeps_unused_criteria_at_zero():
+    weights = perturb_weights(np.array([0.5, 0.0, 0.5]), 100, seed=1)
+    assert np.allclose(weights.sum(axis=1), 1.0)
+    assert (weights[:, 1] == 0).all()
+
+
+def test_result_independent_of_chunking_and_workers(matrices):
+    args = dict(n_samples=300, seed=7)
+    whole = analyze_sensitivity(matrices, BOBOT, **args)
+    # Anggaran kecil memaksa banyak chunk yang dikerjakan paralel
+    chunked = analyze_sensitivity(matrices, BOBOT, workers=3, mem_budget=1, **args)
+    for metode in ("MAUT", "WP"):
+        pd.testing.assert_frame_equal(whole[metode], chunked[metode])
+        hasil = whole[metode]
+        assert (hasil["Rank Terbaik"] <= hasil["Rata-rata Rank"]).all()
+        assert (hasil["Rata-rata Rank"] <= hasil["Rank Terburuk"]).all()
+        assert hasil["P(#1)"].sum() >= 1.0  # Minimal satu laptop #1 per sampel
@@ -0,0 +1,71 @@
+import numpy as np
+import pytest
+
+from sketsa import MIN_DATA, QuantileSketch, derive_likert_config
+from spk import likert_config
+
+
+@pytest.fixture
+def values():
+    rng = np.random.default_rng(0)
+    return np.round(rng.lognormal(16, 0.5, 5000), -3)
+
+
+@pytest.mark.parametrize("q", [0.05, 0.2, 0.5, 0.8, 0.95])
+def test_quantile_bounds_contain_exact_value(values, q):
+    sketch = QuantileSketch()
+    sketch.add(values)
+    exact = np.sort(values)[int(q * (len(values) - 1))]
+    lower, upper = sketch.quantile(q), sketch.quantile(q, upper=True)
+    assert lower <= exact <= upper
+    assert upper / lower <= sketch.gamma * (1 + 1e-9)
+
+
+def test_remove_restores_counts(values):
+    sketch = QuantileSketch()
+    sketch.add(values[:3000])
+    before = dict(sketch.counts), sketch.zero
+    sketch.add(values[3000:])
+    sketch.remove(values[3000:])
+    assert (dict(sketch.counts), sketch.zero) == before
+
+
+def test_merge_equals_single_sketch(values):
+    a, b, both = QuantileSketch(), QuantileSketch(), QuantileSketch()
+    a.add(values[:2000])
+    b.add(values[2000:])
+    both.add(values)
+    a.merge(b)
+    assert a.counts == both.counts and a.count == len(values)
+
+
+def test_merge_rejects_different_alpha():
+    with pytest.raises(ValueError):
+        QuantileSketch(alpha=0.01).merge(QuantileSketch(alpha=0.02))
+
+
+def test_zero_and_nan_values():
+    sketch = QuantileSketch()
+    sketch.add([0, 0, np.nan, 5])
+    assert sketch.zero == 2 and sketch.count == 3
+    assert sketch.quantile(0.0) == 0.0
+
+
+def test_json_roundtrip(values):
+    sketch = QuantileSketch()
+    sketch.add(values)
+    restored = QuantileSketch.from_json(sketch.to_json())
+    assert restored.counts == sketch.counts and restored.zero == sketch.zero
+    assert restored.quantile(0.5) == sketch.quantile(0.5)
+
+
+def test_derive_likert_config_falls_back_below_min_data(values):
+    few, many = QuantileSketch(), QuantileSketch()
+    few.add(values[: MIN_DATA - 1])
+    many.add(values)
+    config = derive_likert_config({"harga": many, "ram": few}, likert_config)
+    assert config["ram"] is likert_config["ram"]
+    assert config["storage"] is likert_config["storage"]
+    breakpoints = config["harga"]["breakpoints"]
+    assert breakpoints == sorted(breakpoints)
+    assert config["harga"]["is_benefit"] == likert_config["harga"]["is_benefit"]
@@ -0,0 +1,64 @@
+import os
+
+import numpy as np
+import pandas as pd
+
+import snapshot
+from conftest import make_laptops
+from storage import SQLiteBackend, Storage
+
+
+def sample():
+    df = make_laptops(20).reset_index(names="id")
+    df.loc[3, "ram"] = np.nan
+    df.loc[4, "gpu"] = None
+    return df
+
+
+def test_round_trip_keeps_values_dtypes_and_nulls(tmp_path):
+    df = sample()
+    assert snapshot.save(tmp_path, "budi", 1, df)
+    loaded = snapshot.load(tmp_path, "budi", 1)
+    pd.testing.assert_frame_equal(loaded.copy(), df)  # copy(): memmap -> ndarray
+    assert loaded.loc[4, "gpu"] is None or pd.isna(loaded.loc[4, "gpu"])
+
+
+def test_stale_or_missing_version_returns_none(tmp_path):
+    snapshot.save(tmp_path, "budi", 1, sample())
+    assert snapshot.load(tmp_path, "budi", 2) is None
+    assert snapshot.load(tmp_path, "ani", 1) is None
+
+
+def test_saving_same_version_twice_is_harmless(tmp_path):
+    # Dua sesi menulis versi yang sama: rename kedua gagal karena folder sudah ada
+    df = sample()
+    assert snapshot.save(tmp_path, "budi", 1, df)
+    assert snapshot.save(tmp_path, "budi", 1, df)
+    user_dir = snapshot._user_dir(tmp_path, "budi")
+    assert os.listdir(user_dir) == ["v1"]
+    pd.testing.assert_frame_equal(snapshot.load(tmp_path, "budi", 1).copy(), df)
+
+
+def test_old_writer_keeps_newer_snapshot(tmp_path):
+    df = sample()
+    snapshot.save(tmp_path, "budi", 1, df)
+    snapshot.save(tmp_path, "budi", 3, df)
+    assert snapshot.load(tmp_path, "budi", 1) is None  # Versi lama dibersihkan
+    snapshot.save(tmp_path, "budi", 2, df)  # Penulis lambat
+    assert snapshot.load(tmp_path, "budi", 3) is not None
+
+
+def test_storage_falls_back_to_sqlite_when_stale(tmp_path):
+    storage = Storage(
+        SQLiteBackend(str(tmp_path / "t.db")), snapshot_dir=str(tmp_path / "snap")
+    )
+    storage.setup_schema()
+    storage.insert_laptops("budi", make_laptops(10))
+    first = storage.get_user_laptops("budi")  # Menulis snapshot v1
+    assert snapshot.load(storage.snapshot_dir, "budi", 1) is not None
+
+    storage.insert_laptops("budi", make_laptops(5, seed=1))
+    second = storage.get_user_laptops("budi")
+    assert len(first) == 10 and len(second) == 15
+    assert snapshot.load(storage.snapshot_dir, "budi", 2) is not None
+    storage.close()
@@ -0,0 +1,58 @@
+import numpy as np
+import pytest
+
+from conftest import make_laptops
+from spk import (
+    build_score_matrices,
+    calculate_maut,
+    calculate_wp,
+    get_tipe,
+    likert_config,
+    score_matrices,
+    top_k,
+)
+
+USER = "budi"
+TIPE = {k: get_tipe(k) for k in likert_config}
+
+
+@pytest.fixture
+def catalog(storage):
+    df = make_laptops(300)
+    df.loc[::11, "ram"] = np.nan
+    df.loc[::17, "layar"] = np.nan
+    storage.insert_laptops(USER, df)
+    return storage.get_user_laptops(USER)
+
+
+@pytest.mark.parametrize(
+    "bobot",
+    [
+        {
+            "harga": 0.3,
+            "ram": 0.2,
+            "storage": 0.1,
+            "prosesor_skor": 0.2,
+            "gpu_skor": 0.1,
+            "layar": 0.05,
+            "rating": 0.05,
+        },
+        {"harga": 0.5, "rating": 0.5},  # Sebagian kriteria saja
+        {"ram": 2.0, "layar": 1.0},  # Bobot tidak dinormalisasi
+    ],
+)
+def test_score_matrices_match_dataframe_path(catalog, bobot):
+    matrices = build_score_matrices(catalog, TIPE)
+    skor_maut, skor_wp = score_matrices(matrices, bobot)
+
+    # rank_results mengisi skor kosong dengan 0
+    want_maut = calculate_maut(catalog, bobot, TIPE)["Skor MAUT"].fillna(0)
+    want_wp = calculate_wp(catalog, bobot, TIPE)["Skor WP"].fillna(0)
+    np.testing.assert_allclose(skor_maut, want_maut.to_numpy(), atol=1e-12)
+    np.testing.assert_allclose(skor_wp, want_wp.to_numpy(), rtol=1e-12)
+
+
+def test_top_k_is_sorted_and_clamped():
+    scores = np.array([0.2, 0.9, 0.5, 0.7, 0.1])
+    assert top_k(scores, 3).tolist() == [1, 3, 2]
+    assert len(top_k(scores, 10)) == 5
@@ -0,0 +1,185 @@
+import sqlite3
+
+import numpy as np
+import pytest
+
+from conftest import make_laptops
+from storage import Backend, StorageBusyError, compact_ids, expand_ids
+
+USER = "budi"
+
+
+def assert_sketches_match_table(storage, username=USER):
+    """Sketsa yang diperbarui inkremental harus sama dengan hasil bangun ulang."""
+    incremental = storage.get_sketches(username)
+    storage.run_in_transaction(
+        lambda conn: conn.execute(
+            "DELETE FROM sketsa_kuantil WHERE username=?", (username,)
+        )
+    )
+    rebuilt = storage.get_sketches(username)
+    assert set(incremental) == set(rebuilt)
+    for k, sketch in rebuilt.items():
+        assert incremental[k].counts == sketch.counts, k
+        assert incremental[k].zero == sketch.zero, k
+
+
+@pytest.mark.parametrize(
+    "ids, text", [([], ""), ([5], "5"), ([3, 1, 2, 7, 9, 10], "1-3,7,9-10")]
+)
+def test_compact_ids_roundtrip(ids, text):
+    assert compact_ids(ids) == text
+    assert expand_ids(text) == sorted(ids)
+
+
+def test_backend_requires_connect_and_schema():
+    class Incomplete(Backend):
+        def connect(self):
+            return None
+
+    with pytest.raises(TypeError):
+        Incomplete()
+
+
+def test_busy_transaction_is_retried_then_raises(storage):
+    attempts = []
+
+    def locked(conn):
+        attempts.append(1)
+        raise sqlite3.OperationalError("database is locked")
+
+    with pytest.raises(StorageBusyError):
+        storage.run_in_transaction(locked)
+    assert len(attempts) == storage.retries + 1
+
+    # Error lain tidak diulang dan koneksi kembali ke pool tanpa transaksi
+    attempts.clear()
+    with pytest.raises(sqlite3.OperationalError):
+        storage.run_in_transaction(
+            lambda conn: attempts.append(1) or conn.execute("SELECT * FROM tidak_ada")
+        )
+    assert len(attempts) == 1
+    with storage.connection() as conn:
+        assert not conn.in_transaction
+
+
+def test_sketches_follow_insert_update_delete(storage):
+    storage.insert_laptops(USER, make_laptops(60))
+    assert_sketches_match_table(storage)
+
+    df = storage.get_user_laptops(USER)
+    row = df.iloc[0].to_dict()
+    row.update(harga=123_000_000.0, ram=np.nan, prosesor="Apple M2")
+    storage.update_laptop_data(USER, row["id"], row)
+    assert_sketches_match_table(storage)
+
+    storage.delete_laptops(USER, df["id"][:10].tolist())
+    assert_sketches_match_table(storage)
+
+    storage.insert_laptop(USER, make_laptops(1, seed=1).iloc[0])
+    assert_sketches_match_table(storage)
+
+    storage.delete_all_user_data(USER)
+    assert storage.get_sketches(USER)["harga"].count == 0
+
+
+def test_unit_of_work_commits_once(storage):
+    storage.insert_laptops(USER, make_laptops(20))
+    versi = storage.get_catalog_version(USER)
+    df = storage.get_user_laptops(USER)
+
+    with storage.unit_of_work(USER) as uow:
+        row = df.iloc[0].to_dict()
+        row["nama"] = "Nama Baru"
+        uow.update_laptop(row["id"], row)
+        uow.update_laptop(df.iloc[1]["id"], df.iloc[1])  # Tidak berubah
+        uow.delete_laptops([df.iloc[2]["id"], 999_999])
+        uow.insert_laptops(make_laptops(3, seed=2))
+        uow.set_bobot({"harga": 0.4, "ram": 0.6})
+
+    assert storage.get_catalog_version(USER) == versi + 1
+    entries = [(e["tabel"], e["aksi"]) for e in uow.journal]
+    assert entries == [
+        ("laptops", "update"),
+        ("laptops", "delete"),
+        ("laptops", "insert"),
+        ("bobot_kriteria", "upsert"),
+    ]
+    assert uow.journal[0]["kolom"] == ["nama"]
+    assert uow.journal[1]["ids"] == [int(df.iloc[2]["id"])]
+    assert len(uow.journal[2]["ids"]) == 3
+    assert storage.get_bobot(USER)[0] == {"harga": 0.4, "ram": 0.6}
+    assert_sketches_match_table(storage)
+
+
+def test_noop_update_does_not_bump_version(storage):
+    storage.insert_laptops(USER, make_laptops(5))
+    versi = storage.get_catalog_version(USER)
+    row = storage.get_user_laptops(USER).iloc[0]
+    storage.update_laptop_data(USER, row["id"], row)
+    assert storage.get_catalog_version(USER) == versi
+    assert storage.get_catalog_changes(USER, versi) == []
+
+
+def test_exception_in_block_writes_nothing(storage):
+    storage.insert_laptops(USER, make_laptops(5))
+    versi = storage.get_catalog_version(USER)
+    with pytest.raises(RuntimeError):
+        with storage.unit_of_work(USER) as uow:
+            uow.delete_all()
+            raise RuntimeError
+    assert storage.get_catalog_version(USER) == versi
+    assert storage.count_user_laptops(USER) == 5
+
+
+def test_unit_of_work_replays_whole_on_busy_retry(storage, monkeypatch):
+    storage.insert_laptops(USER, make_laptops(30))
+    versi = storage.get_catalog_version(USER)
+    df = storage.get_user_laptops(USER)
+
+    # Gagal "database is locked" setelah semua operasi dijalankan, sekali saja
+    original, calls = storage._save_sketches, []
+
+    def flaky_save(conn, username, sketches):
+        calls.append(1)
+        if len(calls) == 1:
+            raise sqlite3.OperationalError("database is locked")
+        original(conn, username, sketches)
+
+    monkeypatch.setattr(storage, "_save_sketches", flaky_save)
+    with storage.unit_of_work(USER) as uow:
+        uow.delete_laptops(df["id"][:5].tolist())
+        uow.insert_laptops(make_laptops(4, seed=3))
+
+    assert len(calls) == 2
+    assert storage.get_catalog_version(USER) == versi + 1
+    assert storage.count_user_laptops(USER) == 29
+    assert len(storage.get_catalog_changes(USER, versi)) == 2
+    monkeypatch.undo()
+    assert_sketches_match_table(storage)
+
+
+def test_catalog_changes_require_contiguous_journal(storage):
+    storage.insert_laptops(USER, make_laptops(5))
+    storage.update_bobot(USER, {"harga": 1.0})
+    df = storage.get_user_laptops(USER)
+    storage.delete_laptops(USER, [df.iloc[0]["id"]])
+
+    changes = storage.get_catalog_changes(USER, 0)
+    assert [c["versi"] for c in changes] == [1, 2]
+    assert all(c["tabel"] == "laptops" for c in changes)
+    assert expand_ids(changes[1]["row_ids"]) == [int(df.iloc[0]["id"])]
+
+    # Versi katalog sebelum jurnal ada: pembaca harus memuat ulang
+    storage.run_in_transaction(
+        lambda conn: conn.execute("DELETE FROM jurnal_perubahan WHERE versi=1")
+    )
+    assert storage.get_catalog_changes(USER, 0) is None
+    assert storage.get_catalog_changes(USER, 1) is not None
+
+
+def test_journal_is_pruned(storage, monkeypatch):
+    monkeypatch.setattr("storage.JOURNAL_KEEP", 3)
+    for i in range(5):
+        storage.update_bobot(USER, {"harga": i / 10})
+    assert len(storage.get_changes(USER)) == 3
@@ -0,0 +1,89 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from validasi import parse_angka, validate_upload
+
+
+@pytest.mark.parametrize(
+    "kolom, teks, nilai",
+    [
+        ("harga", "Rp 15.000.000", 15_000_000),
+        ("harga", "Rp15.000.000,-", 15_000_000),
+        ("harga", "15,5 jt", 15_500_000),
+        ("harga", "800rb", 800_000),
+        ("harga", "15,000,000", 15_000_000),
+        ("harga", "850.000", 850_000),
+        ("harga", "12.000", 12_000),
+        ("harga", "12000000", 12_000_000),
+        ("ram", "16GB", 16),
+        ("ram", "16 GB DDR4", 16),
+        ("storage", "512GB SSD", 512),
+        ("storage", "1TB", 1024),
+        ("layar", '15,6"', 15.6),
+        ("layar", "14 inch", 14),
+        ("rating", "4.5/5", 4.5),
+        ("rating", "4,7", 4.7),
+    ],
+)
+def test_parse_angka_accepts_known_formats(kolom, teks, nilai):
+    hasil, dikoersi = parse_angka(pd.Series([teks], dtype=object), kolom)
+    assert hasil.iloc[0] == pytest.approx(nilai)
+    assert dikoersi.iloc[0]
+
+
+@pytest.mark.parametrize(
+    "kolom, teks",
+    [
+        ("ram", "8+8GB"),
+        ("storage", "2 x 512GB"),
+        ("storage", "512GB+1TB"),
+        ("harga", "15-20jt"),
+        ("harga", "Rp 15jt lebih"),
+        ("rating", "4.5 bintang"),
+        ("ram", "enam belas"),
+    ],
+)
+def test_parse_angka_rejects_partial_numbers(kolom, teks):
+    hasil, dikoersi = parse_angka(pd.Series([teks], dtype=object), kolom)
+    assert np.isnan(hasil.iloc[0])
+    assert not dikoersi.iloc[0]
+
+
+def test_parse_angka_reads_thousands_in_text_column():
+    # Kolom berisi teks semua (dtype str di pandas 3) maupun campuran
+    for dtype in (None, object):
+        series = pd.Series(["850.000", "Rp 9.500.000", "4.5"], dtype=dtype)
+        hasil, _ = parse_angka(series, "harga")
+        assert hasil.tolist() == [850_000, 9_500_000, 4.5]
+
+
+def test_parse_angka_keeps_numeric_cells():
+    hasil, dikoersi = parse_angka(pd.Series([8, 16.0, None], dtype=object), "ram")
+    assert hasil.iloc[:2].tolist() == [8.0, 16.0]
+    assert np.isnan(hasil.iloc[2])
+    assert not dikoersi.any()
+
+
+def test_validate_upload_reports_every_cause_per_row():
+    df = pd.DataFrame(
+        {
+            "nama": ["A", "", "C"],
+            "harga": ["Rp 10.000.000", "12 jt", 15],
+            "ram": ["8+8GB", 16, 16000],
+            "storage": ["512GB", "1TB", 512],
+            "prosesor": ["Intel Core i5", "Apple M2", "AMD Ryzen 5"],
+            "gpu": ["Intel Iris Xe", "Apple M2", "AMD Radeon"],
+            "layar": [14, '15,6"', 15.6],
+            "rating": [4.5, "4,8", 4],
+        }
+    )
+    valid, laporan, koersi = validate_upload(df)
+    assert valid.empty
+    assert laporan["Baris di Excel"].tolist() == [2, 3, 4]
+    penyebab = laporan["Penyebab Error"].tolist()
+    assert penyebab[0] == "ram: format tidak dikenali"
+    assert penyebab[1] == "nama: kosong"
+    assert "harga: di luar rentang" in penyebab[2]
+    assert "ram: di luar rentang" in penyebab[2]
+    assert koersi["harga"] == 2 and koersi["ram"] == 0
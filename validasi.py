@@ -0,0 +1,139 @@
+# validasi.py - Validasi & koersi kolom data unggahan Excel secara tervektorisasi
+#
+# Seluruh pemeriksaan dilakukan per kolom (operasi string/NumPy pada Series),
+# bukan per baris, sebelum ada satu pun data yang disimpan. Hasilnya adalah
+# DataFrame bersih yang siap disisipkan sekaligus dan laporan baris yang
+# dilewati yang disusun dari mask boolean.
+
+import numpy as np
+import pandas as pd
+
+KOLOM_TEKS = ["nama", "prosesor", "gpu"]
+KOLOM_ANGKA = ["harga", "ram", "storage", "layar", "rating"]
+
+# Rentang nilai yang masuk akal untuk tiap kriteria angka. Sengaja jauh lebih
+# lebar dari breakpoints likert_config (yang hanya menentukan skor 1-5) dan
+# selalu mencakupnya, cukup untuk menolak salah satuan/salah ketik seperti
+# RAM 16000 atau harga 15.
+RENTANG_NILAI = {
+    "harga": (100_000, 500_000_000),
+    "ram": (1, 512),
+    "storage": (16, 16_384),
+    "layar": (7, 21),
+    "rating": (0, 5),
+}
+
+# Pengali satuan yang ditulis tepat setelah angka, mis. "15,5 jt" atau "1TB"
+SATUAN = {
+    "harga": {"jt": 1e6, "juta": 1e6, "rb": 1e3, "ribu": 1e3, "k": 1e3},
+    "storage": {"tb": 1024, "gb": 1},
+}
+
+# Teks tanpa pengali yang boleh ditulis setelah angka (dan satuan), sebagai
+# regex. Teks lain apa pun, mis. "8+8GB" atau "2 x 512GB", ditolak sebagai
+# format tidak dikenali alih-alih diam-diam diambil angka pertamanya.
+AKHIRAN = {
+    "harga": r",-",
+    "ram": r"gb(?: (?:lp)?ddr\dx?)?",
+    "storage": r"ssd|hdd|nvme|emmc",
+    "layar": r'"|inch|inci|in',
+    "rating": r"/ ?5",
+}
+
+_POLA_RIBUAN = r"\d{1,3}(?:\.\d{3})+|\d{1,3}(?:,\d{3})+"
+
+
+def _pola_angka(kolom):
+    """Regex satu nilai utuh: [Rp] angka [satuan] [akhiran]."""
+    satuan = "|".join(SATUAN.get(kolom, {}))
+    return (
+        (r"(?:rp\.? ?)?" if kolom == "harga" else "")
+        + r"(\d[\d.,]*) ?"
+        + (rf"({satuan})? ?" if satuan else "()")
+        + (rf"(?:{AKHIRAN[kolom]})?" if kolom in AKHIRAN else "")
+    )
+
+
+def parse_angka(series, kolom):
+    """Mengubah satu kolom menjadi float; teks seperti "Rp 15.000.000", "16GB",
+    '15,6"' atau "4.5/5" diurai sekaligus. Nilai yang tidak dikenali menjadi NaN.
+
+    Seluruh teks harus cocok dengan pola nilai kolom (lihat _pola_angka).
+
+    Mengembalikan (nilai float, mask nilai teks yang berhasil dikonversi).
+    """
+    # Teks selalu lewat pengurai di bawah: to_numeric akan membaca "850.000"
+    # sebagai 850.0, padahal titik di situ pemisah ribuan
+    if pd.api.types.is_numeric_dtype(series):
+        is_str = pd.Series(False, index=series.index)
+    else:
+        is_str = series.map(lambda v: isinstance(v, str)).astype(bool)
+    nilai = pd.to_numeric(series.mask(is_str), errors="coerce").astype(float)
+    teks = is_str | (series.notna() & nilai.isna())
+    if not teks.any():
+        return nilai, teks
+
+    # Data Excel banyak berulang ("16GB", "512GB SSD"): cukup urai nilai uniknya
+    unik = pd.Series(pd.unique(series[teks].astype(str)))
+    s = unik.str.lower().str.replace(r"\s+", " ", regex=True).str.strip()
+    bagian = s.str.extract(f"^{_pola_angka(kolom)}$")
+    angka, satuan = bagian[0].fillna(""), bagian[1].fillna("")
+    # Tanda titik/koma di akhir (mis. "15.") bukan bagian dari angka
+    angka = angka.str.rstrip(".,")
+
+    # Format ribuan murni: "15.000.000" atau "15,000,000"
+    ribuan = angka.str.fullmatch(_POLA_RIBUAN)
+    # Selain itu, pemisah terakhir adalah desimal dan pemisah lainnya ribuan
+    desimal_koma = angka.str.extract(r"([.,])\d*$")[0] == ","
+    bersih = angka.where(~desimal_koma, angka.str.replace(".", "", regex=False))
+    bersih = bersih.where(desimal_koma, bersih.str.replace(",", "", regex=False))
+    bersih = bersih.str.replace(",", ".", regex=False)
+    bersih = bersih.where(~ribuan, angka.str.replace(r"[.,]", "", regex=True))
+
+    hasil = pd.to_numeric(bersih, errors="coerce")
+    hasil = hasil * satuan.map(SATUAN.get(kolom, {})).fillna(1.0)
+    nilai[teks] = series[teks].astype(str).map(dict(zip(unik, hasil)))
+    return nilai, teks & nilai.notna()
+
+
+def validate_upload(df):
+    """Memvalidasi DataFrame hasil normalize_headers.
+
+    Mengembalikan (DataFrame valid, laporan baris dilewati, jumlah koersi per kolom).
+    Laporan berisi satu baris per baris Excel dengan semua penyebabnya.
+    """
+    bersih = pd.DataFrame(index=df.index)
+    masalah = {}  # pesan -> mask baris
+    koersi = {}
+
+    for k in KOLOM_TEKS:
+        teks = df[k].astype("string").str.strip()
+        kosong = teks.isna() | (teks == "")
+        masalah[f"{k}: kosong"] = kosong.to_numpy()
+        bersih[k] = teks.astype(object)
+
+    for k in KOLOM_ANGKA:
+        nilai, dikoersi = parse_angka(df[k], k)
+        kosong = df[k].isna().to_numpy()
+        tidak_dikenal = nilai.isna().to_numpy() & ~kosong
+        lo, hi = RENTANG_NILAI[k]
+        di_luar = ((nilai < lo) | (nilai > hi)).to_numpy()
+        masalah[f"{k}: kosong"] = kosong
+        masalah[f"{k}: format tidak dikenali"] = tidak_dikenal
+        masalah[f"{k}: di luar rentang {lo:g}-{hi:g}"] = di_luar
+        koersi[k] = int(dikoersi.sum())
+        bersih[k] = nilai
+
+    gagal = np.logical_or.reduce(list(masalah.values()))
+    # Pesan per baris dirangkai kolom demi kolom (tanpa groupby per baris)
+    penyebab = np.full(gagal.sum(), "", dtype=object)
+    for teks_pesan, mask in masalah.items():
+        penyebab = penyebab + np.where(mask[gagal], teks_pesan + "; ", "")
+    laporan = pd.DataFrame(
+        {
+            # +2 untuk header dan 0-index
+            "Baris di Excel": np.flatnonzero(gagal) + 2,
+            "Penyebab Error": [p[:-2] for p in penyebab],
+        }
+    )
+    return bersih[~gagal].reset_index(drop=True), laporan, koersi
@@ -1,13 +1,30 @@
 # spk_laptop_refactored.py - Sistem Pendukung Keputusan Pemilihan Laptop (Versi Perbaikan)
 
 import streamlit as st
-import sqlite3
+import os
 import pandas as pd
 import numpy as np
 import plotly.express as px
 from io import BytesIO
 import re
 
+from spk import (
+    build_score_matrices,
+    calculate_maut,
+    calculate_wp,
+    likert_config,
+    rank_results,
+    score_matrices,
+    top_k,
+)
+from kemiripan import SimilarityIndex
+from ranking_cache import RankingCache, make_cache_key
+from ranking_stream import OUT_OF_CORE_THRESHOLD, rank_out_of_core
+from sensitivitas import MAX_WORKERS, analyze_sensitivity
+from sketsa import MIN_DATA
+from storage import SEARCH_LIMIT, SQLiteBackend, Storage
+from validasi import validate_upload
+
 # ---------- 1. KONFIGURASI HALAMAN DAN TAMPILAN ----------
 st.set_page_config(
     page_title="SPK Laptop Pro",
@@ -334,306 +351,187 @@ if st.session_state.page == "login":
 
 # ---------- 4. PENGATURAN DATABASE DAN FUNGSI CRUD ----------
 DB_PATH = "laptop_spk_v2.db"
-conn = sqlite3.connect(DB_PATH, check_same_thread=False)
-c = conn.cursor()
+SNAPSHOT_DIR = "snapshots"
 
 
-def setup_database():
-    """Membuat tabel jika belum ada."""
-    c.execute(
-        """
-    CREATE TABLE IF NOT EXISTS laptops (
-        id INTEGER PRIMARY KEY AUTOINCREMENT, username TEXT, nama TEXT,
-        harga REAL, ram INTEGER, storage INTEGER, prosesor TEXT, prosesor_skor INTEGER,
-        gpu TEXT, gpu_skor INTEGER, layar REAL, rating REAL
-    )"""
-    )
-    c.execute(
-        """
-    CREATE TABLE IF NOT EXISTS bobot_kriteria (
-        username TEXT, kriteria TEXT, bobot REAL, tipe TEXT,
-        PRIMARY KEY (username, kriteria)
-    )"""
-    )
-    conn.commit()
-
-
-setup_database()
-
-# --- Skor untuk Kriteria Kualitatif ---
-prosesor_scores = {
-    # Intel Core Ultra - Pola paling spesifik diutamakan
-    r"core\s*ultra\s*9": 14,
-    r"core\s*ultra\s*7": 12,
-    r"core\s*ultra\s*5": 11,
-    # Apple Silicon
-    r"\bm4\b": 14,
-    r"\bm3\b": 13,
-    r"\bm2\b": 11,
-    r"\bm1\b": 9,
-    # AMD Ryzen - Mencocokkan seri spesifik
-    r"ryzen\s*9\s*\d{4}": 10,
-    r"ryzen\s*7\s*\d{4}": 8,
-    r"ryzen\s*5\s*\d{4}": 6,
-    r"ryzen\s*3\s*\d{4}": 4,
-    # Intel Core i - Mencocokkan seri spesifik
-    r"i9-?\d{4,5}": 10,
-    r"i7-?\d{4,5}": 8,
-    r"i5-?\d{4,5}": 6,
-    r"i3-?\d{4,5}": 4,
-    # Pola fallback yang lebih umum
-    r"ryzen\s*9": 10,
-    r"ryzen\s*7": 8,
-    r"ryzen\s*5": 6,
-    r"ryzen\s*3": 4,
-    r"\bi9\b": 10,
-    r"\bi7\b": 8,
-    r"\bi5\b": 6,
-    r"\bi3\b": 4,
-    # Lainnya
-    r"snapdragon": 7,
-    r"mediatek": 5,
-}
-
-gpu_scores = {
-    # NVIDIA GeForce RTX 40 Series
-    r"rtx\s*4090": 14,
-    r"rtx\s*4080": 13,
-    r"rtx\s*4070": 12,
-    r"rtx\s*4060": 11,
-    r"rtx\s*4050": 10,
-    # NVIDIA GeForce RTX 30 Series
-    r"rtx\s*3080": 12,
-    r"rtx\s*3070": 11,
-    r"rtx\s*3060": 10,
-    r"rtx\s*3050": 9,
-    # NVIDIA GeForce RTX 20 Series & GTX
-    r"rtx\s*2050": 8,
-    r"gtx\s*1660": 7,
-    r"gtx\s*1650": 7,
-    # NVIDIA MX
-    r"mx\s*\d{2,3}": 6,  # MX550, MX450 etc.
-    # AMD Radeon RX
-    r"rx\s*7\d{3}": 9,  # RX 7000 series
-    r"rx\s*6\d{3}": 7,  # RX 6000 series
-    # Apple Integrated
-    r"apple\s*m4": 14,
-    r"apple\s*m3": 12,
-    r"apple\s*m2": 10,
-    r"apple\s*m1": 8,
-    # Intel Integrated
-    r"intel\s*arc": 5.5,
-    r"iris\s*xe": 4,
-    r"uhd\s*graphics": 3,
-    # AMD Integrated (paling umum)
-    r"amd\s*radeon\s*graphics": 5,
-    r"amd\s*radeon": 5,
-}
-
-
-# PERBAIKAN: Fungsi get_skor sekarang menggunakan regex
-def get_skor(nama, skor_dict):
-    nama_lower = str(nama).lower()
-    # Mengurutkan berdasarkan panjang pola regex (terpanjang/paling spesifik dulu)
-    for pattern, score in sorted(
-        skor_dict.items(), key=lambda item: len(item[0]), reverse=True
-    ):
-        if re.search(pattern, nama_lower):
-            return score
-    return 5  # Skor default jika tidak ada kecocokan ditemukan
+@st.cache_resource
+def get_storage():
+    """Satu lapisan storage (dengan pool koneksi) untuk semua sesi Streamlit."""
+    storage = Storage(SQLiteBackend(DB_PATH), snapshot_dir=SNAPSHOT_DIR)
+    storage.setup_schema()
+    return storage
+
+
+db = get_storage()
+
+
+@st.cache_resource
+def get_ranking_cache():
+    """Satu cache hasil ranking untuk semua sesi, disimpan juga ke database."""
+    return RankingCache(storage=db)
+
+
+# --- Versi Katalog (untuk invalidasi cache) ---
+def get_catalog_version():
+    """Mengambil versi katalog pengguna saat ini."""
+    return db.get_catalog_version(st.session_state.username)
 
 
 # --- Fungsi-fungsi CRUD (Create, Read, Update, Delete) ---
 def insert_laptop(data):
     """Menyimpan satu data laptop baru."""
-    ps = get_skor(data["prosesor"], prosesor_scores)
-    gs = get_skor(data["gpu"], gpu_scores)
-    c.execute(
-        "INSERT INTO laptops (username, nama, harga, ram, storage, prosesor, prosesor_skor, gpu, gpu_skor, layar, rating) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)",
-        (
-            st.session_state.username,
-            data["nama"],
-            data["harga"],
-            data["ram"],
-            data["storage"],
-            data["prosesor"],
-            ps,
-            data["gpu"],
-            gs,
-            data["layar"],
-            data["rating"],
-        ),
-    )
-    conn.commit()
+    db.insert_laptop(st.session_state.username, data)
 
 
-def get_user_laptops():
-    """Mengambil semua data laptop milik pengguna."""
-    return pd.read_sql(
-        "SELECT * FROM laptops WHERE username=?",
-        conn,
-        params=(st.session_state.username,),
-    )
+def insert_laptops(df):
+    """Menyimpan banyak laptop sekaligus (hasil validasi unggahan Excel)."""
+    return db.insert_laptops(st.session_state.username, df)
+
+
+def count_user_laptops(batasan=None):
+    """Menghitung jumlah laptop pengguna (opsional: hanya yang memenuhi batasan)."""
+    return db.count_user_laptops(st.session_state.username, batasan)
+
+
+def get_user_laptops(batasan=None):
+    """Mengambil semua data laptop milik pengguna (opsional: hanya yang lolos batasan)."""
+    return db.get_user_laptops(st.session_state.username, batasan)
+
+
+def get_laptops_by_ids(ids, batasan=None):
+    """Mengambil data laptop milik pengguna untuk daftar ID tertentu."""
+    return db.get_laptops_by_ids(st.session_state.username, ids, batasan)
+
+
+def get_extrema(kriteria, batasan=None):
+    """Nilai (min, max) tiap kriteria, dihitung database tanpa memuat baris."""
+    return db.get_extrema(st.session_state.username, kriteria, batasan)
 
 
 def update_laptop_data(id_to_update, data):
     """Memperbarui data laptop berdasarkan ID."""
-    ps = get_skor(data["prosesor"], prosesor_scores)
-    gs = get_skor(data["gpu"], gpu_scores)
-    c.execute(
-        "UPDATE laptops SET nama=?, harga=?, ram=?, storage=?, prosesor=?, prosesor_skor=?, gpu=?, gpu_skor=?, layar=?, rating=? WHERE id=? AND username=?",
-        (
-            data["nama"],
-            data["harga"],
-            data["ram"],
-            data["storage"],
-            data["prosesor"],
-            ps,
-            data["gpu"],
-            gs,
-            data["layar"],
-            data["rating"],
-            id_to_update,
-            st.session_state.username,
-        ),
-    )
-    conn.commit()
+    db.update_laptop_data(st.session_state.username, id_to_update, data)
 
 
 def delete_laptops(ids_to_delete):
     """Menghapus beberapa laptop berdasarkan daftar ID."""
-    c.executemany(
-        "DELETE FROM laptops WHERE id=? AND username=?",
-        [(id, st.session_state.username) for id in ids_to_delete],
-    )
-    conn.commit()
+    db.delete_laptops(st.session_state.username, ids_to_delete)
 
 
 def delete_all_user_data():
     """Menghapus semua data laptop milik pengguna."""
-    c.execute("DELETE FROM laptops WHERE username=?", (st.session_state.username,))
-    conn.commit()
+    db.delete_all_user_data(st.session_state.username)
+
+
+def unit_of_work():
+    """Mengelompokkan beberapa operasi tulis pengguna menjadi satu transaksi."""
+    return db.unit_of_work(st.session_state.username)
+
+
+def get_catalog_changes(since_versi):
+    """Entri jurnal perubahan katalog setelah versi tertentu (None jika tidak lengkap)."""
+    return db.get_catalog_changes(st.session_state.username, since_versi)
+
+
+# --- Pencarian Full-Text ---
+def search_laptops(query, limit=SEARCH_LIMIT):
+    """Mencari laptop milik pengguna berdasarkan nama, prosesor, atau GPU."""
+    return db.search_laptops(st.session_state.username, query, limit)
 
 
 # --- Fungsi untuk Bobot ---
 def update_bobot(bobot_dict):
     """Memperbarui atau menyimpan bobot kriteria pengguna."""
-    c.execute(
-        "DELETE FROM bobot_kriteria WHERE username=?", (st.session_state.username,)
-    )
-    for k, v in bobot_dict.items():
-        tipe = "cost" if k == "harga" else "benefit"
-        c.execute(
-            "INSERT INTO bobot_kriteria VALUES (?, ?, ?, ?)",
-            (st.session_state.username, k, v, tipe),
-        )
-    conn.commit()
+    db.update_bobot(st.session_state.username, bobot_dict)
 
 
 def get_bobot():
     """Mengambil bobot kriteria pengguna. Jika tidak ada, gunakan default."""
-    df = pd.read_sql(
-        "SELECT * FROM bobot_kriteria WHERE username=?",
-        conn,
-        params=(st.session_state.username,),
-    )
-    default_bobot = {
-        "harga": 0.25,
-        "ram": 0.15,
-        "storage": 0.10,
-        "prosesor_skor": 0.20,
-        "gpu_skor": 0.20,
-        "layar": 0.05,
-        "rating": 0.05,
-    }
-    if df.empty:
-        tipe = {
-            k: ("cost" if k == "harga" else "benefit") for k in default_bobot.keys()
-        }
-        return default_bobot, tipe
-    return (
-        df.set_index("kriteria")["bobot"].to_dict(),
-        df.set_index("kriteria")["tipe"].to_dict(),
+    return db.get_bobot(st.session_state.username)
+
+
+# --- Fungsi untuk Batasan (Filter Wajib) ---
+def update_batasan(batasan_dict):
+    """Menyimpan batasan kriteria pengguna; kriteria tanpa min/max dihapus."""
+    db.update_batasan(st.session_state.username, batasan_dict)
+
+
+def get_batasan():
+    """Mengambil batasan kriteria pengguna dalam bentuk {kriteria: (min, max)}."""
+    return db.get_batasan(st.session_state.username)
+
+
+# --- Fungsi untuk Skala Likert ---
+def get_likert_otomatis():
+    """Apakah breakpoints Likert pengguna diturunkan dari kuantil katalog."""
+    return db.get_likert_otomatis(st.session_state.username)
+
+
+def set_likert_otomatis(otomatis):
+    db.set_likert_otomatis(st.session_state.username, otomatis)
+
+
+def get_likert_config():
+    """likert_config yang berlaku untuk pengguna (bawaan atau dari kuantil katalog)."""
+    return db.get_likert_config(st.session_state.username)
+
+
+# --- Ranking dengan Cache ---
+def get_ranking(bobot, tipe, batasan=None):
+    """Mengambil hasil ranking dari cache; dihitung ulang hanya jika ada perubahan.
+
+    MAUT min/max dihitung atas himpunan laptop yang sudah lolos batasan.
+    """
+    cache = get_ranking_cache()
+    config = get_likert_config()
+    key = make_cache_key(
+        st.session_state.username,
+        get_catalog_version(),
+        bobot,
+        tipe,
+        config,
+        batasan,
     )
+    hasil = cache.get(key)
+    if hasil is None:
+        df = get_user_laptops(batasan)
+        if len(df) < 2:
+            return None
+        df_maut = calculate_maut(df, bobot, tipe)
+        df_wp = calculate_wp(df, bobot, tipe, config)
+        hasil = {"results": rank_results(df, df_maut, df_wp), "maut": df_maut, "wp": df_wp}
+        cache.put(key, hasil)
+    return hasil
 
 
-# ---------- 5. FUNGSI-FUNGSI LOGIKA SPK & UTILITAS (REFACTORED) ----------
-
-
-def to_likert_generic(value, breakpoints, is_benefit=True):
-    """Fungsi generik untuk konversi ke skala Likert (1-5)."""
-    # Breakpoints diurutkan dari nilai terendah ke tertinggi
-    if is_benefit:  # Semakin tinggi nilai, semakin bagus skornya
-        if value >= breakpoints[3]:
-            return 5
-        if value >= breakpoints[2]:
-            return 4
-        if value >= breakpoints[1]:
-            return 3
-        if value >= breakpoints[0]:
-            return 2
-        return 1
-    else:  # Semakin rendah nilai, semakin bagus skornya (contoh: harga)
-        if value <= breakpoints[0]:
-            return 5
-        if value <= breakpoints[1]:
-            return 4
-        if value <= breakpoints[2]:
-            return 3
-        if value <= breakpoints[3]:
-            return 2
-        return 1
-
-
-# --- Konfigurasi untuk konversi Likert ---
-likert_config = {
-    "harga": {"breakpoints": [7e6, 12e6, 18e6, 25e6], "is_benefit": False},
-    "ram": {"breakpoints": [4, 8, 16, 32], "is_benefit": True},
-    "storage": {"breakpoints": [256, 512, 1024, 2048], "is_benefit": True},
-    "prosesor_skor": {"breakpoints": [5, 7, 9, 12], "is_benefit": True},
-    "gpu_skor": {"breakpoints": [5, 7, 9, 12], "is_benefit": True},
-    "layar": {"breakpoints": [14, 15, 16, 17], "is_benefit": True},
-    "rating": {"breakpoints": [2, 3, 4, 4.5], "is_benefit": True},
-}
-
-
-def calculate_maut(df, bobot, tipe):
-    """Menghitung skor MAUT menggunakan normalisasi Min-Max."""
-    df_maut = df.copy()
-    for k in bobot.keys():
-        n_k_col, x = f"n_{k}", df_maut[k]
-        min_val, max_val = x.min(), x.max()
-        if min_val == max_val:
-            df_maut[n_k_col] = 1.0
-        else:
-            if tipe.get(k) == "cost":
-                df_maut[n_k_col] = (max_val - x) / (max_val - min_val)
-            else:
-                df_maut[n_k_col] = (x - min_val) / (max_val - min_val)
+@st.cache_data(max_entries=16, show_spinner=False)
+def get_out_of_core_ranking(username, versi, bobot, tipe, batasan, k, config):
+    """Top-K hasil ranking out-of-core (kecil, aman disalin oleh cache_data)."""
+    hasil, _ = rank_out_of_core(db, username, bobot, tipe, batasan, k, config=config)
+    return hasil
 
-    df_maut["Skor MAUT"] = sum(df_maut[f"n_{k}"] * w for k, w in bobot.items())
-    return df_maut
 
+@st.cache_resource(max_entries=32)
+def get_score_matrices(username, versi, tipe, batasan, config):
+    """Matriks utilitas MAUT & log-Likert WP, dihitung sekali per versi katalog.
 
-def calculate_wp(df, bobot, tipe):
-    """Menghitung skor WP menggunakan skala Likert."""
-    df_wp = df.copy()
-    for k, config in likert_config.items():
-        df_wp[f"likert_{k}"] = df_wp[k].apply(lambda x: to_likert_generic(x, **config))
+    Memakai cache_resource (bukan cache_data) agar matriks tidak disalin setiap
+    kali dibaca; username dan versi hanya berperan sebagai kunci cache.
+    """
+    df = get_user_laptops(batasan)
+    if len(df) < 2:
+        return None
+    return build_score_matrices(df, tipe, config=config)
 
-    total_bobot = sum(bobot.values())
-    bobot_norm_wp = {
-        k: (w / total_bobot if tipe.get(k) == "benefit" else -w / total_bobot)
-        for k, w in bobot.items()
-    }
 
-    df_wp["Skor WP"] = 1.0
-    for k, w_norm in bobot_norm_wp.items():
-        likert_values = df_wp[f"likert_{k}"].replace(0, 1)  # Hindari pangkat 0
-        df_wp["Skor WP"] *= likert_values**w_norm
-    return df_wp
+@st.cache_resource(max_entries=32)
+def get_similarity_index(username, batasan):
+    """Indeks KD-tree per pengguna & batasan; sync() memperbaruinya saat versi
+    katalog berubah."""
+    return SimilarityIndex()
 
 
+# ---------- 5. FUNGSI-FUNGSI UTILITAS ----------
 # --- Utilitas Lainnya ---
 def convert_df_to_excel(df):
     """Mengonversi DataFrame ke file Excel dalam format bytes."""
@@ -666,6 +564,90 @@ def normalize_headers(df_columns):
 
 
 # ---------- 6. TAMPILAN UTAMA APLIKASI (SETELAH LOGIN) ----------
+def show_out_of_core_results(bobot, tipe, batasan, jumlah):
+    """Halaman hasil untuk katalog sangat besar: hanya Top-K, dihitung per chunk."""
+    st.info(
+        f"Katalog berisi {jumlah:,} laptop. Peringkat dihitung secara bertahap (out-of-core) "
+        "dan hanya Top-K yang ditampilkan; detail perhitungan per laptop tidak tersedia."
+    )
+    k_top = st.number_input("Tampilkan Top-K", 10, 1000, 50, step=10, key="ooc_k")
+    with st.spinner("Menghitung peringkat per potongan data..."):
+        hasil = get_out_of_core_ranking(
+            st.session_state.username,
+            get_catalog_version(),
+            bobot,
+            tipe,
+            batasan,
+            int(k_top),
+            get_likert_config(),
+        )
+    col_wp, col_maut = st.columns(2)
+    for col, metode in [(col_wp, "WP"), (col_maut, "MAUT")]:
+        col.markdown(f"**Top {len(hasil[metode])} {metode}**")
+        col.dataframe(
+            hasil[metode].drop(columns="id"), use_container_width=True, hide_index=True
+        )
+        col.download_button(
+            f"⬇️ Unduh Top-K {metode} ke Excel",
+            convert_df_to_excel(hasil[metode]),
+            f"ranking_{metode.lower()}_top{int(k_top)}.xlsx",
+            "application/vnd.openxmlformats-officedocument.spreadsheetml.sheet",
+            key=f"ooc_download_{metode}",
+        )
+
+
+@st.fragment
+def show_what_if(current_bobot, tipe, batasan):
+    """Pratinjau ranking langsung saat slider bobot digeser (tanpa menyimpan)."""
+    matrices = get_score_matrices(
+        st.session_state.username,
+        get_catalog_version(),
+        tipe,
+        batasan,
+        get_likert_config(),
+    )
+    if matrices is None:
+        st.warning("Dibutuhkan minimal 2 data laptop untuk pratinjau ranking.")
+        return
+
+    cols = st.columns(2)
+    bobot_slider = {}
+    for i, (k, v) in enumerate(current_bobot.items()):
+        label = k.replace("_skor", "").replace("_", " ").title()
+        with cols[i % 2]:
+            bobot_slider[k] = st.slider(
+                f"Bobot {label} (%)", 0, 100, int(v * 100), key=f"whatif_{k}"
+            )
+    total = sum(bobot_slider.values())
+    if total == 0:
+        st.error("Minimal satu kriteria harus memiliki bobot.")
+        return
+    bobot_norm = {k: v / total for k, v in bobot_slider.items()}
+
+    k_top = st.number_input("Tampilkan Top-K", 1, 100, 10, key="whatif_k")
+    skor_maut, skor_wp = score_matrices(matrices, bobot_norm)
+    col_wp, col_maut = st.columns(2)
+    for col, metode, skor in [(col_wp, "WP", skor_wp), (col_maut, "MAUT", skor_maut)]:
+        idx = top_k(skor, k_top)
+        col.markdown(f"**Top {len(idx)} {metode}**")
+        col.dataframe(
+            pd.DataFrame(
+                {"nama": matrices["nama"][idx], f"Skor {metode}": skor[idx]},
+                index=pd.RangeIndex(1, len(idx) + 1, name="Rank"),
+            ),
+            use_container_width=True,
+        )
+
+    st.caption(
+        f"Total slider {total}%; bobot dinormalisasi menjadi 100% untuk pratinjau. "
+        "Belum ada yang disimpan."
+    )
+    if st.button("💾 Simpan Bobot Pratinjau Ini", key="whatif_save"):
+        update_bobot({k: round(v, 4) for k, v in bobot_norm.items()})
+        st.success("Bobot berhasil diperbarui!")
+        st.rerun()
+
+
 def show_main_app():
     """Fungsi utama yang menjalankan seluruh UI aplikasi."""
 
@@ -699,11 +681,26 @@ def show_main_app():
         st.info(
             "Anda dapat mengedit data langsung di tabel di bawah ini. Untuk menghapus, centang baris yang diinginkan lalu klik tombol Hapus."
         )
-        df_original = get_user_laptops()
-        if df_original.empty:
-            st.warning(
-                "Belum ada data. Silakan tambahkan melalui menu 'Tambah Data' atau 'Unggah Data'."
+        cari = st.text_input(
+            "🔍 Cari Laptop", placeholder="nama, prosesor, atau GPU", key="cari_kelola"
+        )
+        # Ambil satu baris lebih untuk mengetahui apakah hasil terpotong
+        df_original = search_laptops(cari, SEARCH_LIMIT + 1)
+        if df_original is None:
+            df_original = get_user_laptops()
+        elif len(df_original) > SEARCH_LIMIT:
+            df_original = df_original.head(SEARCH_LIMIT)
+            st.info(
+                f"Hanya {SEARCH_LIMIT} laptop paling relevan yang ditampilkan. "
+                "Perjelas kata kunci untuk mempersempit hasil."
             )
+        if df_original.empty:
+            if cari.strip():
+                st.warning(f"Tidak ada laptop yang cocok dengan '{cari}'.")
+            else:
+                st.warning(
+                    "Belum ada data. Silakan tambahkan melalui menu 'Tambah Data' atau 'Unggah Data'."
+                )
         else:
             # Menggunakan st.data_editor
             df_editable = df_original.drop(
@@ -732,11 +729,12 @@ def show_main_app():
             # --- Logika untuk Simpan Perubahan dan Hapus ---
             col1, col2, col3 = st.columns([2, 2, 1])
             if col1.button("💾 Simpan Perubahan", key="save_changes"):
-                # Bandingkan dataframe sebelum dan sesudah diedit
-                for index, row in edited_df.iterrows():
-                    original_row = df_original[df_original["id"] == row["id"]]
-                    if not original_row.empty and not original_row.iloc[0].equals(row):
-                        update_laptop_data(row["id"], row)
+                # Semua baris dikirim dalam satu transaksi; baris yang tidak
+                # berubah dilewati dan hanya kolom yang berubah ditulis. Baris
+                # baru dari editor (id kosong) tidak punya pasangan, jadi dilewati.
+                with unit_of_work() as uow:
+                    for _, row in edited_df[edited_df["id"].notna()].iterrows():
+                        uow.update_laptop(row["id"], row)
                 st.success("Perubahan berhasil disimpan!")
                 st.rerun()
 
@@ -839,35 +837,22 @@ def show_main_app():
                     )
                 else:
                     st.success("File berhasil dibaca. Memproses...")
-                    inserted_count, skipped_rows = 0, []
-                    progress_bar = st.progress(0, "Memproses data...")
-                    total_rows = len(df_normalized)
-                    for i, row in df_normalized.iterrows():
-                        try:
-                            data_to_insert = row.to_dict()
-                            data_to_insert["username"] = st.session_state.username
-                            insert_laptop(data_to_insert)
-                            inserted_count += 1
-                        except Exception as e:
-                            skipped_rows.append(
-                                (i + 2, str(e))
-                            )  # +2 untuk header dan 0-index
-                        progress_bar.progress(
-                            (i + 1) / total_rows,
-                            f"Memproses baris {i+1}/{total_rows}...",
-                        )
+                    # Validasi & koersi per kolom dulu, baru simpan sekaligus
+                    valid_df, skipped_rows, koersi = validate_upload(df_normalized)
+                    inserted_count = insert_laptops(valid_df)
 
                     st.success(
                         f"Proses selesai! Berhasil menambahkan {inserted_count} data baru."
                     )
-                    if skipped_rows:
-                        st.warning(f"{len(skipped_rows)} baris dilewati karena error.")
-                        st.dataframe(
-                            pd.DataFrame(
-                                skipped_rows,
-                                columns=["Baris di Excel", "Penyebab Error"],
-                            )
+                    dikoersi = {k: n for k, n in koersi.items() if n}
+                    if dikoersi:
+                        st.info(
+                            "Nilai teks yang dikonversi otomatis ke angka: "
+                            + ", ".join(f"`{k}` ({n})" for k, n in dikoersi.items())
                         )
+                    if len(skipped_rows):
+                        st.warning(f"{len(skipped_rows)} baris dilewati karena error.")
+                        st.dataframe(skipped_rows, hide_index=True)
 
             except Exception as e:
                 st.error(f"Gagal memproses file: {e}")
@@ -878,7 +863,14 @@ def show_main_app():
         st.info(
             "Sesuaikan bobot untuk setiap kriteria sesuai dengan preferensi Anda. Total bobot harus 100%."
         )
-        current_bobot, _ = get_bobot()
+        current_bobot, tipe = get_bobot()
+        if st.toggle(
+            "🔬 Mode What-If (pratinjau ranking langsung)",
+            key="whatif_mode",
+            help="Geser slider untuk melihat perubahan ranking seketika. Bobot baru disimpan hanya jika Anda menekan tombol simpan.",
+        ):
+            show_what_if(current_bobot, tipe, get_batasan())
+            st.markdown("---")
         with st.form("weight_form"):
             bobot_input = {}
             cols = st.columns(2)
@@ -903,44 +895,140 @@ def show_main_app():
                 else:
                     st.error("Total bobot harus tepat 100%. Mohon periksa kembali.")
 
+        # --- Batasan (Filter Wajib) ---
+        st.markdown("---")
+        st.subheader("Filter Wajib (Batasan Kriteria)")
+        st.info(
+            "Laptop yang tidak memenuhi batasan tidak akan ikut dihitung dan diranking. Kosongkan kolom jika tidak ada batasan."
+        )
+        current_batasan = get_batasan()
+        with st.form("constraint_form"):
+            batasan_input = {}
+            for k in likert_config.keys():
+                label = k.replace("_skor", "").replace("_", " ").title()
+                min_val, max_val = current_batasan.get(k, (None, None))
+                col_min, col_max = st.columns(2)
+                batasan_input[k] = (
+                    col_min.number_input(
+                        f"{label} Minimum", value=min_val, key=f"batasan_min_{k}"
+                    ),
+                    col_max.number_input(
+                        f"{label} Maksimum", value=max_val, key=f"batasan_max_{k}"
+                    ),
+                )
+
+            if st.form_submit_button("Simpan Filter"):
+                invalid = [
+                    k
+                    for k, (min_val, max_val) in batasan_input.items()
+                    if min_val is not None and max_val is not None and min_val > max_val
+                ]
+                if invalid:
+                    st.error(
+                        f"Nilai minimum lebih besar dari maksimum pada: `{', '.join(invalid)}`."
+                    )
+                else:
+                    update_batasan(batasan_input)
+                    batasan = get_batasan()
+                    total, lolos = count_user_laptops(), count_user_laptops(batasan)
+                    st.success(
+                        f"Filter berhasil disimpan! {lolos} dari {total} laptop memenuhi batasan."
+                    )
+
+        st.markdown("---")
+        st.subheader("Skala Likert (Metode WP)")
+        st.info(
+            "Secara bawaan, nilai kriteria dikonversi ke skala 1-5 memakai batas tetap. Mode otomatis menurunkan batas dari kuantil (20/40/60/80%) katalog Anda, sehingga setiap level berisi kira-kira jumlah laptop yang sama."
+        )
+        likert_otomatis = get_likert_otomatis()
+        if (
+            st.toggle(
+                "Breakpoints otomatis dari data katalog",
+                value=likert_otomatis,
+                key="likert_otomatis",
+            )
+            != likert_otomatis
+        ):
+            set_likert_otomatis(not likert_otomatis)
+            likert_otomatis = not likert_otomatis
+        if likert_otomatis:
+            st.caption(
+                f"Kriteria dengan kurang dari {MIN_DATA} data tetap memakai batas bawaan."
+            )
+        config = get_likert_config()
+        st.dataframe(
+            pd.DataFrame(
+                [
+                    {
+                        "Kriteria": k,
+                        "Tipe": "benefit" if cfg["is_benefit"] else "cost",
+                        **{
+                            f"Batas {i + 1}": bp
+                            for i, bp in enumerate(cfg["breakpoints"])
+                        },
+                        "Sumber": "bawaan" if cfg is likert_config[k] else "kuantil",
+                    }
+                    for k, cfg in config.items()
+                ]
+            ),
+            use_container_width=True,
+            hide_index=True,
+        )
+
     # --- Menu: Hasil Rekomendasi ---
     elif menu_selection == "📊 Hasil Rekomendasi":
         st.subheader("Analisis dan Perankingan Laptop")
-        df = get_user_laptops()
-        if len(df) < 2:
+        bobot, tipe = get_bobot()
+        batasan = get_batasan()
+        lolos = count_user_laptops(batasan)
+        if batasan:
+            total = count_user_laptops()
+            st.info(
+                f"Filter wajib aktif: {lolos} dari {total} laptop memenuhi batasan "
+                f"({lolos / total:.0%} lolos)."
+                if total
+                else "Filter wajib aktif."
+            )
+        out_of_core = lolos > OUT_OF_CORE_THRESHOLD
+        hasil = None if out_of_core else get_ranking(bobot, tipe, batasan)
+        if out_of_core:
+            show_out_of_core_results(bobot, tipe, batasan, lolos)
+        elif hasil is None:
             st.warning(
                 "Dibutuhkan minimal 2 data laptop untuk melakukan analisis perbandingan."
+                + (" Coba longgarkan filter wajib Anda." if batasan else "")
             )
         else:
-            bobot, tipe = get_bobot()
-            df_maut = calculate_maut(df, bobot, tipe)
-            df_wp = calculate_wp(df, bobot, tipe)
-
-            # --- Gabungkan Hasil ---
-            results = df[["id", "nama"]].copy()
-            results = pd.merge(
-                results, df_maut[["id", "Skor MAUT"]], on="id", how="left"
-            )
-            results = pd.merge(results, df_wp[["id", "Skor WP"]], on="id", how="left")
-            results.fillna(0, inplace=True)
-            results["Rank MAUT"] = (
-                results["Skor MAUT"].rank(ascending=False, method="min").astype(int)
-            )
-            results["Rank WP"] = (
-                results["Skor WP"].rank(ascending=False, method="min").astype(int)
-            )
+            results, df_maut, df_wp = hasil["results"], hasil["maut"], hasil["wp"]
 
             # --- Tampilkan Hasil ---
             st.info(
                 "Berikut adalah hasil perankingan laptop berdasarkan preferensi bobot Anda."
             )
-            tab_summary, tab_wp, tab_maut = st.tabs(
-                ["🏆 Ringkasan Peringkat", "⚙️ Detail WP", "⚙️ Detail MAUT"]
+            tab_summary, tab_wp, tab_maut, tab_sens, tab_mirip = st.tabs(
+                [
+                    "🏆 Ringkasan Peringkat",
+                    "⚙️ Detail WP",
+                    "⚙️ Detail MAUT",
+                    "🎯 Sensitivitas Bobot",
+                    "🔗 Laptop Serupa",
+                ]
             )
 
             with tab_summary:
+                cari = st.text_input(
+                    "🔍 Cari di Hasil Peringkat",
+                    placeholder="nama, prosesor, atau GPU",
+                    key="cari_hasil",
+                )
+                ditemukan = search_laptops(cari, limit=None)
+                if ditemukan is not None:
+                    results_tampil = results[results["id"].isin(ditemukan["id"])]
+                    st.caption(f"{len(results_tampil)} laptop cocok dengan '{cari}'.")
+                else:
+                    results_tampil = results
                 st.dataframe(
-                    results[
+                    results_tampil[
                         ["nama", "Skor WP", "Rank WP", "Skor MAUT", "Rank MAUT"]
                     ].sort_values("Rank WP"),
                     use_container_width=True,
@@ -972,6 +1060,129 @@ def show_main_app():
                     use_container_width=True,
                 )
 
+            with tab_sens:
+                st.subheader("Analisis Sensitivitas & Stabilitas Peringkat")
+                st.info(
+                    "Setiap bobot digeser acak sebesar ±delta (poin persen) ribuan kali, lalu dilihat seberapa sering tiap laptop bertahan di peringkat atas."
+                )
+                with st.form("sensitivity_form"):
+                    col1, col2, col3 = st.columns(3)
+                    n_samples = col1.number_input(
+                        "Jumlah Simulasi", 100, 100000, 2000, step=500
+                    )
+                    delta = col2.number_input("Delta Bobot (±%)", 1, 50, 5)
+                    k_sens = col3.number_input("Top-K", 1, 20, 3)
+                    run_sens = st.form_submit_button("Jalankan Analisis")
+                if run_sens:
+                    matrices = get_score_matrices(
+                        st.session_state.username,
+                        get_catalog_version(),
+                        tipe,
+                        batasan,
+                        get_likert_config(),
+                    )
+                    with st.spinner("Menghitung ribuan skenario bobot..."):
+                        sens = analyze_sensitivity(
+                            matrices,
+                            bobot,
+                            n_samples=int(n_samples),
+                            delta=delta / 100,
+                            k=int(k_sens),
+                            workers=min(os.cpu_count() or 1, MAX_WORKERS),
+                        )
+                    for metode in ["WP", "MAUT"]:
+                        df_sens = sens[metode]
+                        juara = df_sens.iloc[0]
+                        st.markdown(
+                            f"**{metode}:** `{juara['nama']}` tetap #1 pada "
+                            f"{juara['P(#1)']:.1%} simulasi."
+                        )
+                        st.dataframe(
+                            df_sens.drop(columns="id"),
+                            use_container_width=True,
+                            column_config={
+                                "P(#1)": st.column_config.ProgressColumn(
+                                    "P(#1)", min_value=0, max_value=1, format="%.2f"
+                                ),
+                                f"P(Top {int(k_sens)})": st.column_config.ProgressColumn(
+                                    f"P(Top {int(k_sens)})",
+                                    min_value=0,
+                                    max_value=1,
+                                    format="%.2f",
+                                ),
+                            },
+                        )
+
+            with tab_mirip:
+                st.subheader("Cari Laptop Serupa")
+                st.info(
+                    "Kemiripan diukur dari jarak antar nilai kriteria yang sudah dinormalisasi (kolom n_* pada MAUT), di antara laptop yang lolos batasan Anda."
+                )
+                urutan = results.sort_values("Rank WP")
+                col1, col2, col3 = st.columns([3, 1, 1])
+                acuan = col1.selectbox(
+                    "Laptop acuan",
+                    urutan["id"],
+                    format_func=dict(zip(urutan["id"], urutan["nama"])).get,
+                    key="mirip_acuan",
+                )
+                k_mirip = col2.number_input("Jumlah", 1, 50, 5, key="mirip_k")
+                lebih_murah = col3.toggle("Lebih murah", key="mirip_murah")
+
+                # Indeks dibangun atas himpunan yang sama dengan results, sehingga
+                # normalisasinya sama dengan kolom n_*. Perubahan katalog dibaca
+                # per baris dari jurnal; katalog penuh hanya dimuat jika perlu.
+                index = get_similarity_index(st.session_state.username, batasan)
+                index.sync(
+                    get_catalog_version(),
+                    lambda: get_user_laptops(batasan),
+                    get_catalog_changes,
+                    lambda ids: get_laptops_by_ids(ids, batasan),
+                    lambda kriteria: get_extrema(kriteria, batasan),
+                )
+                try:
+                    ids_mirip, jarak = index.query(
+                        int(acuan), int(k_mirip), lebih_murah
+                    )
+                except KeyError:
+                    # Laptop acuan baru saja dihapus (atau tidak lagi lolos batasan)
+                    ids_mirip = jarak = None
+                if ids_mirip is None:
+                    st.warning(
+                        "Laptop acuan tidak lagi ada di katalog. Muat ulang halaman untuk memperbarui hasil."
+                    )
+                elif len(ids_mirip) == 0:
+                    st.warning("Tidak ada laptop lain yang memenuhi kriteria tersebut.")
+                else:
+                    mirip = get_laptops_by_ids(ids_mirip).set_index("id")
+                    mirip = mirip.loc[ids_mirip].reset_index()
+                    mirip["Kemiripan"] = 1 - jarak / np.sqrt(len(index.kriteria))
+                    mirip = mirip.merge(
+                        results[["id", "Rank WP", "Rank MAUT"]], on="id", how="left"
+                    )
+                    st.dataframe(
+                        mirip[
+                            [
+                                "nama",
+                                "Kemiripan",
+                                "harga",
+                                "ram",
+                                "storage",
+                                "prosesor",
+                                "gpu",
+                                "Rank WP",
+                                "Rank MAUT",
+                            ]
+                        ],
+                        use_container_width=True,
+                        hide_index=True,
+                        column_config={
+                            "Kemiripan": st.column_config.ProgressColumn(
+                                "Kemiripan", min_value=0, max_value=1, format="%.2f"
+                            )
+                        },
+                    )
+
             # --- Visualisasi ---
             st.subheader("Visualisasi Peringkat")
             col1, col2 = st.columns(2)